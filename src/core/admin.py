@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User
+from .models import ArchivedSubmission, RoutingRule, User, ValidationSchema
 
 
 @admin.register(User)
@@ -7,3 +7,32 @@ class UserAdmin(admin.ModelAdmin):
     list_display = ["username", "email", "role", "is_active", "is_staff"]
     list_filter = ["role", "is_active", "is_staff"]
     search_fields = ["username", "email"]
+
+
+@admin.register(ValidationSchema)
+class ValidationSchemaAdmin(admin.ModelAdmin):
+    list_display = ["channel", "is_active", "updated_at"]
+    list_filter = ["is_active"]
+
+
+@admin.register(RoutingRule)
+class RoutingRuleAdmin(admin.ModelAdmin):
+    list_display = [
+        "category", "source", "support_line", "status", "l3_watch",
+        "is_active",
+    ]
+    list_filter = ["support_line", "is_active"]
+
+
+@admin.register(ArchivedSubmission)
+class ArchivedSubmissionAdmin(admin.ModelAdmin):
+    """Архив только для просмотра"""
+    list_display = ["id", "channel", "status", "submitted_at", "archived_at"]
+    list_filter = ["channel", "status"]
+    date_hierarchy = "submitted_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,135 @@
+"""Перенос старых заявок данных в архив.
+
+Заявки старше срока хранения (SUBMISSION_RETENTION_DAYS) переносятся
+из DataSubmission в ArchivedSubmission небольшими пакетами, каждый в
+своей транзакции: INSERT ... SELECT в архив, удаление из рабочей
+таблицы и уменьшение счётчиков SubmissionCounter. Перенесённые строки
+исчезают из рабочей таблицы, поэтому прерванный перенос продолжается
+следующим запуском с того же места.
+
+На PostgreSQL архив разбит на месячные секции; секция создаётся перед
+переносом первого пакета за её месяц.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .counters import batched_counter_updates
+from .models import ArchivedSubmission, DataSubmission
+
+DEFAULT_RETENTION_DAYS = 365
+ARCHIVE_BATCH_SIZE = 1000
+# Необработанные заявки ещё ждут validate_submissions
+ARCHIVED_STATUSES = ("accepted", "rejected")
+
+
+def retention_cutoff(days=None):
+    if days is None:
+        days = getattr(
+            settings, "SUBMISSION_RETENTION_DAYS", DEFAULT_RETENTION_DAYS
+        )
+    return timezone.now() - timedelta(days=days)
+
+
+def month_start(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(start):
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(start):
+    return f"core_archivedsubmission_p{start:%Y%m}"
+
+
+def ensure_partitions(first, last):
+    """Месячные секции архива от first до last включительно (PostgreSQL)."""
+    if connection.vendor != "postgresql":
+        return
+    start = month_start(first)
+    with connection.cursor() as cursor:
+        while start <= last:
+            end = next_month(start)
+            # Границы секции в DDL — литералы, не параметры запроса
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(start)} "
+                "PARTITION OF core_archivedsubmission "
+                f"FOR VALUES FROM ('{start.isoformat()}') "
+                f"TO ('{end.isoformat()}')"
+            )
+            start = end
+
+
+def copy_sql(count):
+    """INSERT ... SELECT из рабочей таблицы в архив по списку id."""
+    columns = [
+        field.column for field in DataSubmission._meta.concrete_fields
+    ]
+    quote = connection.ops.quote_name
+    column_list = ", ".join(quote(column) for column in columns)
+    return (
+        f"INSERT INTO {quote(ArchivedSubmission._meta.db_table)} "
+        f"({column_list}, {quote('archived_at')}) "
+        f"SELECT {column_list}, %s "
+        f"FROM {quote(DataSubmission._meta.db_table)} "
+        f"WHERE {quote('id')} IN ({', '.join(['%s'] * count)})"
+    )
+
+
+def archive_candidates(cutoff):
+    """Заявки к переносу, самые старые первыми.
+
+    Файл офлайн-загрузки переносится после своих строк: удаление файла
+    из рабочей таблицы удалило бы ещё не перенесённые строки каскадом.
+    """
+    return (
+        DataSubmission.objects.filter(
+            submitted_at__lt=cutoff, status__in=ARCHIVED_STATUSES
+        )
+        .exclude(Exists(
+            DataSubmission.objects.filter(source_file=OuterRef("pk"))
+        ))
+        .order_by("submitted_at", "id")
+    )
+
+
+def archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Перенос одного пакета; возвращает число перенесённых заявок."""
+    with transaction.atomic():
+        rows = list(
+            archive_candidates(cutoff)
+            # Параллельный запуск возьмёт следующий пакет (PostgreSQL)
+            .select_for_update(skip_locked=True, of=("self",))
+            .only("id", "submitted_at")
+            [:batch_size]
+        )
+        if not rows:
+            return 0
+        ids = [row.id for row in rows]
+        ensure_partitions(rows[0].submitted_at, rows[-1].submitted_at)
+        with connection.cursor() as cursor:
+            cursor.execute(copy_sql(len(ids)), [timezone.now(), *ids])
+        with batched_counter_updates():
+            DataSubmission.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archived_submissions(since=None, until=None):
+    """Архивные заявки за период [since, until).
+
+    Период лучше задавать всегда: на PostgreSQL он ограничивает чтение
+    нужными месячными секциями.
+    """
+    archived = ArchivedSubmission.objects.all()
+    if since is not None:
+        archived = archived.filter(submitted_at__gte=since)
+    if until is not None:
+        archived = archived.filter(submitted_at__lt=until)
+    return archived.order_by("-submitted_at", "-id")
@@ -0,0 +1,31 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .models import User
+
+USER_CACHE_KEY = "auth:user:{}"
+USER_CACHE_TIMEOUT = 600
+
+
+def invalidate_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, берущий пользователя сессии из кэша.
+
+    Объект пользователя (вместе с ролью и уровнем поддержки) кэшируется,
+    поэтому аутентифицированный запрос не обращается к core_user. Кэш
+    сбрасывается сигналами при сохранении и удалении пользователя.
+    """
+
+    def get_user(self, user_id):
+        key = USER_CACHE_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User._default_manager.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
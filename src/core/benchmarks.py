@@ -0,0 +1,314 @@
+"""Бенчмарки представлений core.
+
+Каждый именованный маршрут из core/urls.py прогоняется через тестовый
+клиент Django от пользователя нужной роли; для каждого сценария
+записываются время ответа, число SQL-запросов и пиковая память.
+Замеры выполняются с пустым кэшем (холодный запрос).
+Отчёт сравнивается с сохранённым базовым, превышение бюджета
+считается регрессией.
+"""
+import itertools
+import json
+from io import StringIO
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from .models import Ticket, User
+
+BENCH_PASSWORD = "123"
+
+BENCH_USERS = {
+    "respondent": {"role": "respondent"},
+    "admin": {"role": "admin"},
+    "provider": {"role": "provider"},
+    "l1": {"role": "support", "support_level": 1},
+    "l2": {"role": "support", "support_level": 2},
+    "l3": {"role": "support", "support_level": 3},
+}
+
+DEFAULT_DATASET = {
+    "users": 500,
+    "submissions": 20000,
+    "tickets": 5000,
+    "notifications": 20000,
+}
+
+# Маршруты, которые нельзя измерить запросом-ответом
+SKIPPED_ROUTES = {
+    "ticket_events": "бесконечный поток SSE",
+    "provider": "нет шаблона provider_dashboard.html, ответ 500",
+}
+
+
+# Повторяющиеся записи API отсекаются как дубликаты, поэтому каждый
+# запрос сценария отправляет новые данные
+record_numbers = itertools.count(1)
+
+
+def api_record(index=None):
+    if index is None:
+        index = next(record_numbers)
+    return {
+        "provider_name": "bench",
+        "data": {"student_id": index, "name": f"Студент {index}"},
+    }
+
+
+def record_body():
+    return json.dumps(api_record())
+
+
+def batch_body(size=100):
+    return json.dumps([api_record() for _ in range(size)])
+
+
+def csv_upload():
+    rows = "\n".join(f"{i},{i % 100}" for i in range(200))
+    return SimpleUploadedFile(
+        "bench.csv", f"student_id,score\n{rows}\n".encode()
+    )
+
+
+# name: (имя маршрута, метод, пользователь, параметры запроса)
+SCENARIOS = {
+    "dashboard": ("dashboard", "get", "respondent", {}),
+    "admin_data": ("admin_data", "get", "admin", {}),
+    "admin_data_filtered": (
+        "admin_data", "get", "admin",
+        {"data": {"channel": "1", "status": "accepted"}},
+    ),
+    "admin_data_payload": (
+        "admin_data", "get", "admin",
+        {"data": {"key": "student_id", "value": "42"}},
+    ),
+    "ticket_create_form": ("ticket_create", "get", "provider", {}),
+    "ticket_create": (
+        "ticket_create", "post", "provider",
+        {"data": {
+            "subject": "Бенчмарк", "description": "Текст",
+            "category": "api_issue",
+        }},
+    ),
+    "ticket_list_l1": ("ticket_list", "get", "l1", {}),
+    "ticket_list_l2": ("ticket_list", "get", "l2", {}),
+    "ticket_list_l3": ("ticket_list", "get", "l3", {}),
+    "ticket_detail": ("ticket_detail", "get", "l1", {"ticket": True}),
+    "ticket_search": (
+        "ticket_search", "get", "l1", {"data": {"q": "нагрузочные заявки"}},
+    ),
+    "ticket_escalate_form": (
+        "ticket_escalate", "get", "l1", {"ticket": True},
+    ),
+    "ticket_resolve": ("ticket_resolve", "post", "l1", {"ticket": True}),
+    "ticket_bulk_escalate": (
+        "ticket_bulk_action", "post", "l1",
+        {"data": {"action": "escalate", "to_level": "2"}, "queue": 100},
+    ),
+    "ticket_add_comment": (
+        "ticket_add_comment", "post", "l1",
+        {"ticket": True, "data": {"comment": "Ответ"}},
+    ),
+    "api_data_submission": (
+        "api_data_submission", "post", None,
+        {"body": record_body},
+    ),
+    "api_data_batch_submission": (
+        "api_data_batch_submission", "post", None,
+        {"body": batch_body},
+    ),
+    "submit_data_form": ("submit_data", "get", "respondent", {}),
+    "submit_data": (
+        "submit_data", "post", "respondent",
+        {"data": {"data_json": json.dumps(api_record(1)["data"])}},
+    ),
+    "upload_offline_form": ("upload_offline", "get", "respondent", {}),
+    "upload_offline": (
+        "upload_offline", "post", "respondent",
+        {"files": csv_upload},
+    ),
+    "notifications": ("notifications", "get", "l1", {}),
+    "notifications_unread_count": (
+        "notifications_unread_count", "get", "l1", {},
+    ),
+    "api_ticket_list": (
+        "api_ticket_list", "get", "l1", {"data": {"page_size": 1000}},
+    ),
+    "api_ticket_detail": ("api_ticket_detail", "get", "l1", {"ticket": True}),
+    "api_ticket_search": (
+        "api_ticket_search", "get", "l1", {"data": {"q": "бенчмарк"}},
+    ),
+    "metrics": ("metrics", "get", None, {}),
+}
+
+
+def seed_dataset(sizes=None, seed=0):
+    """Наполнение базы данными для бенчмарков."""
+    sizes = {**DEFAULT_DATASET, **(sizes or {})}
+    call_command(
+        "generate_load_data",
+        users=sizes["users"],
+        submissions=sizes["submissions"],
+        tickets=sizes["tickets"],
+        notifications=sizes["notifications"],
+        seed=seed,
+        prefix="bench_load",
+        stdout=StringIO(),
+    )
+    users = {}
+    for name, fields in BENCH_USERS.items():
+        # С --keepdb пользователи остаются от прошлого прогона
+        username = f"bench_{name}"
+        users[name] = (
+            User.objects.filter(username=username).first()
+            or User.objects.create_user(
+                username=username, password=BENCH_PASSWORD, **fields
+            )
+        )
+    return users
+
+
+def bench_ticket(author):
+    """Открытая заявка первой линии для сценариев с ticket_id."""
+    return Ticket.objects.create(
+        subject="Бенчмарк", description="Текст", user=author,
+        support_line=1, status="open", category="notification",
+    )
+
+
+def build_request(scenario, ticket):
+    url_name, method, _, params = SCENARIOS[scenario]
+    kwargs = {"ticket_id": ticket.id} if params.get("ticket") else {}
+    url = reverse(url_name, kwargs=kwargs)
+    request = {"path": url}
+    if "data" in params:
+        request["data"] = params["data"]
+    if "queue" in params:
+        # Отмеченные заявки очереди L1, включая заявку сценария
+        ids = Ticket.objects.filter(
+            support_line=1, status__in=["open", "in_progress"]
+        ).values_list("id", flat=True)[:params["queue"]]
+        request["data"] = {**request.get("data", {}), "ticket_ids": list(ids)}
+    if "body" in params:
+        request["data"] = params["body"]()
+        request["content_type"] = "application/json"
+    if "files" in params:
+        request["data"] = {"data_file": params["files"]()}
+    return method, request
+
+
+class QueryCounter:
+    """Счётчик SQL-запросов через execute_wrapper.
+
+    В отличие от CaptureQueriesContext не ограничен размером журнала
+    запросов, что важно для представлений с N+1.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, method, request):
+    """Один запрос: (статус, секунды, число запросов, пик памяти в КБ)."""
+    queries = QueryCounter()
+    tracemalloc.start()
+    try:
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            response = getattr(client, method)(**request)
+            elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return response.status_code, elapsed, queries.count, peak // 1024
+
+
+def run_benchmarks(users, repeats=5, scenarios=None):
+    """Прогон сценариев; возвращает отчёт в виде словаря."""
+    clients = {None: Client(raise_request_exception=False)}
+    for name, user in users.items():
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        clients[name] = client
+
+    views = {}
+    for scenario in scenarios or SCENARIOS:
+        url_name, _, user_name, _ = SCENARIOS[scenario]
+        client = clients[user_name]
+        timings = []
+        for _ in range(repeats):
+            ticket = bench_ticket(users["provider"])
+            method, request = build_request(scenario, ticket)
+            # Каждый замер — с пустым кэшем, иначе повторы смешивают
+            # попадания и промахи и число запросов зависит от порядка
+            cache.clear()
+            status, elapsed, queries, peak_kb = measure(
+                client, method, request
+            )
+            timings.append(elapsed * 1000)
+        views[scenario] = {
+            "url_name": url_name,
+            "status": status,
+            "queries": queries,
+            "time_ms": round(statistics.median(timings), 2),
+            "time_ms_max": round(max(timings), 2),
+            "peak_kb": peak_kb,
+        }
+    return {"repeats": repeats, "views": views}
+
+
+def server_errors(report):
+    """Сценарии, завершившиеся ответом 5xx."""
+    return [
+        f"{scenario}: статус {result['status']}"
+        for scenario, result in report["views"].items()
+        if result["status"] >= 500
+    ]
+
+
+def compare_reports(report, baseline, time_tolerance=2.0,
+                    memory_tolerance=1.5, query_slack=0):
+    """Сравнение отчёта с базовым; возвращает список нарушений бюджета.
+
+    Число запросов детерминировано и сравнивается почти точно, время и
+    память — с допуском, так как зависят от машины. Ответ 5xx — всегда
+    нарушение, даже если он записан в базовом отчёте.
+    """
+    violations = server_errors(report)
+    for scenario, budget in baseline.get("views", {}).items():
+        result = report["views"].get(scenario)
+        if result is None:
+            violations.append(f"{scenario}: сценарий не выполнялся")
+            continue
+        if result["status"] != budget["status"]:
+            violations.append(
+                f"{scenario}: статус {result['status']} "
+                f"вместо {budget['status']}"
+            )
+        if result["queries"] > budget["queries"] + query_slack:
+            violations.append(
+                f"{scenario}: {result['queries']} SQL-запросов "
+                f"при бюджете {budget['queries']}"
+            )
+        if result["time_ms"] > budget["time_ms"] * time_tolerance:
+            violations.append(
+                f"{scenario}: {result['time_ms']} мс "
+                f"при бюджете {budget['time_ms']} мс"
+            )
+        if result["peak_kb"] > budget["peak_kb"] * memory_tolerance:
+            violations.append(
+                f"{scenario}: пик памяти {result['peak_kb']} КБ "
+                f"при бюджете {budget['peak_kb']} КБ"
+            )
+    return violations
@@ -0,0 +1,13 @@
+from .notifications import unread_count
+
+
+def unread_notifications(request):
+    """Количество непрочитанных уведомлений для шаблонов.
+
+    Передаётся функцией, поэтому кэш читается только если шаблон
+    действительно выводит значение.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {"unread_notifications": lambda: unread_count(user.pk)}
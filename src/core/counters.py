@@ -0,0 +1,132 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+from .models import (
+    OFFLINE_STREAM_EXTENSIONS,
+    DataSubmission,
+    SubmissionCounter,
+    SubmissionTotal,
+)
+
+
+def counted_submissions():
+    """Заявки, которые учитываются в счётчиках: без файлов загрузки."""
+    upload_files = Q()
+    for extension in OFFLINE_STREAM_EXTENSIONS:
+        upload_files |= Q(file_upload__endswith=extension)
+    return DataSubmission.objects.exclude(upload_files)
+
+
+def count_submissions(submissions, sign=1):
+    """Изменения счётчиков для набора заявок."""
+    deltas = Counter()
+    for submission in submissions:
+        if not submission.is_upload_file:
+            deltas[SubmissionCounter.key_for(submission)] += sign
+    return deltas
+
+
+_batch = threading.local()
+
+
+@contextmanager
+def batched_counter_updates():
+    """Удаления внутри блока уменьшают счётчики одним вызовом apply.
+
+    Без блока сигнал post_delete обновляет счётчик на каждую удалённую
+    заявку. Вызывать внутри транзакции удаления.
+    """
+    if getattr(_batch, "deltas", None) is not None:
+        yield
+        return
+    _batch.deltas = Counter()
+    try:
+        yield
+        deltas = _batch.deltas
+    finally:
+        _batch.deltas = None
+    SubmissionCounter.apply(deltas)
+
+
+def submission_deleted(submission):
+    """Уменьшение счётчиков после удаления заявки."""
+    deltas = count_submissions([submission], sign=-1)
+    if getattr(_batch, "deltas", None) is not None:
+        _batch.deltas.update(deltas)
+    else:
+        SubmissionCounter.apply(deltas)
+
+
+def channel_totals():
+    """Количество заявок по каналам из итогов SubmissionTotal.
+
+    Строк итогов не больше каналов × статусов, поэтому запрос не
+    зависит ни от числа заявок, ни от срока хранения.
+    """
+    return dict(
+        SubmissionTotal.objects.values("channel")
+        .annotate(sum_total=Sum("total"))
+        .order_by()
+        .values_list("channel", "sum_total")
+    )
+
+
+def reconcile_counters():
+    """Пересчёт счётчиков и итогов по таблице заявок.
+
+    Возвращает количество исправленных строк счётчиков и итогов.
+    """
+    actual = {
+        (row["channel"], row["status"], row["day"]): row["total"]
+        for row in (
+            counted_submissions().annotate(day=TruncDate("submitted_at"))
+            .values("channel", "status", "day")
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+    }
+    actual_totals = Counter()
+    for (channel, status, _), total in actual.items():
+        actual_totals[channel, status] += total
+    with transaction.atomic():
+        return (
+            reconcile_rows(SubmissionCounter, ("channel", "status", "day"),
+                           actual)
+            + reconcile_rows(SubmissionTotal, ("channel", "status"),
+                             actual_totals)
+        )
+
+
+def reconcile_rows(model, key_fields, actual):
+    """Приведение строк model к значениям actual {ключ: total}."""
+    stored = {
+        tuple(getattr(counter, field) for field in key_fields): counter
+        for counter in model.objects.select_for_update()
+    }
+    actual = dict(actual)
+    fixed = 0
+    to_update = []
+    to_delete = []
+    for key, counter in stored.items():
+        total = actual.pop(key, 0)
+        if counter.total != total:
+            fixed += 1
+        if not total:
+            # Нулевые строки остаются после смены статусов
+            to_delete.append(counter.pk)
+        elif counter.total != total:
+            counter.total = total
+            to_update.append(counter)
+    to_create = [
+        model(total=total, **dict(zip(key_fields, key)))
+        for key, total in actual.items()
+    ]
+    model.objects.filter(pk__in=to_delete).delete()
+    model.objects.bulk_update(to_update, ["total"])
+    model.objects.bulk_create(to_create)
+    return fixed + len(to_create)
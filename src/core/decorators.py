@@ -22,3 +22,23 @@ def role_required(allowed_roles):
         return _wrapped_view
 
     return decorator
+
+
+def query_budget(max_queries):
+    """Декоратор, объявляющий предельное число SQL-запросов
+    представления. Проверяется в QueryCountMiddleware.
+    """
+
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+
+    return decorator
+
+
+def untracked_queries(view_func):
+    """Декоратор для потоковых представлений: QueryCountMiddleware
+    не считает их запросы — поток читает БД уже после ответа.
+    """
+    view_func.track_queries = False
+    return view_func
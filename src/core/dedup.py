@@ -0,0 +1,82 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import SubmissionFingerprint
+
+DEFAULT_DEDUP_WINDOW = 600
+DEFAULT_IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+
+def content_hash(record):
+    """SHA-256 содержимого записи API: поставщик и данные."""
+    payload = json.dumps(
+        [record["provider_name"], record["data"]],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def fingerprint_key(record, digest, idempotency_key=None, index=None):
+    """Ключ отпечатка: по Idempotency-Key, если он передан, иначе по
+    хэшу содержимого. В пакете ключ запроса дополняется номером записи.
+    """
+    if not idempotency_key:
+        return f"hash:{digest}"
+    scope = json.dumps(
+        [record["provider_name"], idempotency_key, index],
+        ensure_ascii=False,
+    )
+    return f"key:{hashlib.sha256(scope.encode()).hexdigest()}"
+
+
+def expires_at(idempotency_key=None):
+    if idempotency_key:
+        seconds = getattr(
+            settings, "IDEMPOTENCY_KEY_TTL", DEFAULT_IDEMPOTENCY_KEY_TTL
+        )
+    else:
+        seconds = getattr(
+            settings, "SUBMISSION_DEDUP_WINDOW", DEFAULT_DEDUP_WINDOW
+        )
+    return timezone.now() + timedelta(seconds=seconds)
+
+
+def find_fingerprints(keys):
+    """Действующие отпечатки {ключ: (хэш, submission_id, статус)}.
+
+    Один запрос по уникальному индексу key.
+    """
+    if not keys:
+        return {}
+    rows = SubmissionFingerprint.objects.filter(
+        key__in=keys, expires_at__gt=timezone.now()
+    ).values_list("key", "content_hash", "submission_id", "submission__status")
+    return {key: rest for key, *rest in rows}
+
+
+def save_fingerprints(fingerprints):
+    """Запись отпечатков новых заявок.
+
+    Просроченные отпечатки с теми же ключами удаляются; если ключ
+    параллельно занял другой запрос, bulk_create бросит IntegrityError.
+    Вызывать внутри транзакции вместе с созданием заявок.
+    """
+    if not fingerprints:
+        return
+    SubmissionFingerprint.objects.filter(
+        key__in=[fingerprint.key for fingerprint in fingerprints],
+        expires_at__lte=timezone.now(),
+    ).delete()
+    SubmissionFingerprint.objects.bulk_create(fingerprints)
+
+
+def purge_expired_fingerprints():
+    """Удаление просроченных отпечатков; возвращает их количество."""
+    deleted, _ = SubmissionFingerprint.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
@@ -0,0 +1,192 @@
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def ticket_audience(ticket):
+    """Уровни поддержки, которым показывается заявка."""
+    levels = {ticket.support_line}
+    if ticket.l3_watch:
+        levels.add(3)
+    return levels
+
+
+def ticket_event(event_type, ticket):
+    """Событие заявки для отправки агентам."""
+    return {
+        "type": event_type,
+        "ticket": {
+            "id": ticket.id,
+            "subject": ticket.subject,
+            "status": ticket.status,
+            "support_line": ticket.support_line,
+            "category": ticket.category,
+        },
+    }
+
+
+class Subscription(ABC):
+    """Подписка одного клиента на события своего уровня."""
+
+    @abstractmethod
+    async def get(self, timeout):
+        """Следующее событие или None, если за timeout ничего не пришло."""
+
+    async def close(self):
+        pass
+
+
+class InProcessSubscription(Subscription):
+
+    def __init__(self, broker, level):
+        self.broker = broker
+        self.level = level
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event):
+        if self.queue.full():
+            # Медленный клиент: теряем самое старое событие
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Брокер событий в памяти процесса.
+
+    Подходит для одного процесса ASGI-сервера. Публикация выполняется
+    из синхронного кода, поэтому события передаются в цикл событий
+    подписчика через call_soon_threadsafe.
+    """
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, level):
+        subscription = InProcessSubscription(self, level)
+        with self._lock:
+            self._subscribers.setdefault(level, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.get(subscription.level, set()).discard(
+                subscription
+            )
+
+    def publish(self, levels, event):
+        with self._lock:
+            targets = [
+                subscription
+                for level in levels
+                for subscription in self._subscribers.get(level, ())
+            ]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, event
+                )
+            except RuntimeError:
+                # Цикл событий уже закрыт
+                self.unsubscribe(subscription)
+
+
+class RedisSubscription(Subscription):
+
+    def __init__(self, pubsub, channel):
+        self.pubsub = pubsub
+        self.channel = channel
+        self.subscribed = False
+
+    async def get(self, timeout):
+        if not self.subscribed:
+            await self.pubsub.subscribe(self.channel)
+            self.subscribed = True
+        message = await self.pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=timeout
+        )
+        if message is None:
+            return None
+        return json.loads(message["data"])
+
+    async def close(self):
+        await self.pubsub.aclose()
+
+
+class RedisBroker:
+    """Брокер событий через Redis Pub/Sub для нескольких узлов.
+
+    Требует пакет redis; параметры: URL и префикс каналов.
+    """
+
+    def __init__(self, URL="redis://localhost:6379/0",
+                 PREFIX="tickets:level:"):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured(
+                "Для RedisBroker требуется пакет redis"
+            ) from exc
+        self.url = URL
+        self.prefix = PREFIX
+        self.client = redis.Redis.from_url(URL)
+        self.async_redis = redis.asyncio
+
+    def subscribe(self, level):
+        client = self.async_redis.Redis.from_url(self.url)
+        return RedisSubscription(client.pubsub(), f"{self.prefix}{level}")
+
+    def publish(self, levels, event):
+        payload = json.dumps(event, ensure_ascii=False)
+        for level in levels:
+            self.client.publish(f"{self.prefix}{level}", payload)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Брокер из настройки TICKET_EVENTS (по умолчанию в памяти)."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, "TICKET_EVENTS", {})
+                backend = import_string(
+                    config.get("BACKEND", "core.events.InProcessBroker")
+                )
+                _broker = backend(**config.get("OPTIONS", {}))
+    return _broker
+
+
+def publish_ticket_event(event_type, ticket):
+    """Отправка события заявки агентам соответствующих уровней."""
+    try:
+        get_broker().publish(
+            ticket_audience(ticket), ticket_event(event_type, ticket)
+        )
+    except Exception:
+        # Доставка событий не должна ломать работу с заявками
+        logger.exception("Failed to publish ticket event %s", event_type)
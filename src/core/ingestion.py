@@ -0,0 +1,237 @@
+import codecs
+import csv
+import json
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .counters import count_submissions
+from .dedup import (
+    content_hash,
+    expires_at,
+    find_fingerprints,
+    fingerprint_key,
+    save_fingerprints,
+)
+from .models import DataSubmission, SubmissionCounter, SubmissionFingerprint
+from .parsers import InvalidRecord
+
+BULK_BATCH_SIZE = 500
+API_BATCH_MAX_RECORDS = 10000
+OFFLINE_ROW_BATCH_SIZE = 1000
+DEDUP_ATTEMPTS = 3
+IDEMPOTENCY_CONFLICT = "Idempotency-Key уже использован с другими данными"
+
+
+def api_record_error(record):
+    """Текст ошибки для записи канала API или None."""
+    if isinstance(record, InvalidRecord):
+        return record.error
+    if not isinstance(record, dict):
+        return "Запись должна быть объектом"
+    if not record.get("provider_name"):
+        return "Требуется поле 'provider_name'"
+    data_payload = record.get("data")
+    if not data_payload or not isinstance(data_payload, dict):
+        return "Требуется поле 'data' в виде объекта"
+    return None
+
+
+def validation_error_text(exc):
+    """Сообщение ValidationError одной строкой."""
+    return "; ".join(exc.messages)
+
+
+def bulk_save_submissions(submissions, deltas=None):
+    """Пакетная вставка заявок данных в одной транзакции.
+
+    bulk_create не вызывает save(), поэтому объекты должны быть заранее
+    проверены full_clean(). Первичные ключи заполняются у переданных
+    объектов. Если передан deltas, изменения счётчиков добавляются в
+    него и применяются вызывающим кодом.
+    """
+    with transaction.atomic():
+        DataSubmission.objects.bulk_create(
+            submissions, batch_size=BULK_BATCH_SIZE
+        )
+        if deltas is None:
+            SubmissionCounter.apply(count_submissions(submissions))
+        else:
+            deltas.update(count_submissions(submissions))
+    return submissions
+
+
+def ingest_api_records(records, idempotency_key=None):
+    """Пакетный приём записей канала API.
+
+    Повторы (тот же Idempotency-Key или то же содержимое в пределах окна
+    SUBMISSION_DEDUP_WINDOW) не создают новых заявок: для них
+    возвращается submission_id исходной заявки с отметкой duplicate.
+    Возвращает список результатов по каждой записи в исходном порядке:
+    либо submission_id и статус, либо описание ошибки.
+    """
+    for _ in range(DEDUP_ATTEMPTS - 1):
+        try:
+            return _ingest_api_records(records, idempotency_key)
+        except IntegrityError:
+            # Параллельный повтор успел записать тот же отпечаток:
+            # при следующей попытке он найдётся как дубликат
+            continue
+    return _ingest_api_records(records, idempotency_key)
+
+
+def _ingest_api_records(records, idempotency_key):
+    results = []
+    candidates = []
+    for index, record in enumerate(records):
+        error = api_record_error(record)
+        if error is None:
+            submission = DataSubmission(
+                provider_name=record["provider_name"],
+                channel=1,
+                data=record["data"],
+                status="pending",
+            )
+            try:
+                submission.full_clean()
+            except ValidationError as exc:
+                error = validation_error_text(exc)
+        if error is not None:
+            results.append({"index": index, "error": error})
+            continue
+        digest = content_hash(record)
+        key = fingerprint_key(record, digest, idempotency_key, index)
+        result = {"index": index}
+        results.append(result)
+        candidates.append((result, submission, key, digest))
+
+    existing = find_fingerprints([key for _, _, key, _ in candidates])
+    submissions = []
+    fingerprints = []
+    first_seen = {}
+    expires = expires_at(idempotency_key)
+    for result, submission, key, digest in candidates:
+        if key in existing:
+            known_digest, submission_id, submission_status = existing[key]
+            if known_digest != digest:
+                result["error"] = IDEMPOTENCY_CONFLICT
+                continue
+            result.update(
+                submission_id=submission_id,
+                status=submission_status,
+                duplicate=True,
+            )
+        elif key in first_seen:
+            # Повтор внутри одного пакета
+            result["duplicate_of"] = first_seen[key]
+        else:
+            first_seen[key] = submission
+            submissions.append(submission)
+            fingerprints.append(SubmissionFingerprint(
+                key=key, content_hash=digest, submission=submission,
+                expires_at=expires,
+            ))
+            result["submission"] = submission
+
+    if submissions:
+        with transaction.atomic():
+            bulk_save_submissions(submissions)
+            save_fingerprints(fingerprints)
+
+    for result in results:
+        submission = result.pop("submission", None)
+        duplicate_of = result.pop("duplicate_of", None)
+        if duplicate_of is not None:
+            submission = duplicate_of
+            result["duplicate"] = True
+        if submission is not None:
+            result["submission_id"] = submission.id
+            result["status"] = submission.status
+    return results
+
+
+def iter_csv_records(uploaded_file):
+    """Построчное чтение CSV: (номер строки, запись, ошибка)."""
+    lines = codecs.iterdecode(uploaded_file, "utf-8-sig", errors="replace")
+    reader = csv.DictReader(lines)
+    try:
+        for row in reader:
+            if None in row or None in row.values():
+                yield reader.line_num, None, "Неверное число столбцов"
+            else:
+                yield reader.line_num, row, None
+    except csv.Error as exc:
+        yield reader.line_num, None, f"Ошибка формата CSV: {exc}"
+
+
+def iter_ndjson_records(uploaded_file):
+    """Построчное чтение NDJSON: (номер строки, запись, ошибка)."""
+    for line_no, raw_line in enumerate(uploaded_file, start=1):
+        try:
+            line = raw_line.decode("utf-8-sig").strip()
+            if not line:
+                continue
+            yield line_no, json.loads(line), None
+        except ValueError:
+            yield line_no, None, "Неверный формат JSON"
+
+
+def ingest_offline_file(user, uploaded_file):
+    """Потоковый разбор CSV/NDJSON-файла в отдельные записи.
+
+    Файл сохраняется заявкой-загрузкой, каждая строка файла становится
+    DataSubmission, привязанной к загрузке через source_file; строки
+    вставляются пакетами по OFFLINE_ROW_BATCH_SIZE, поэтому память не
+    зависит от размера файла. Разобранные строки ждут проверки в статусе
+    pending, строки с ошибками формата сразу отклоняются с ошибкой в
+    validation_errors. Загрузка и строки пишутся в одной транзакции, а
+    сама загрузка не проходит через validate_submissions. Счётчики
+    обновляются один раз перед коммитом: их строки общие для всех
+    загрузок канала, и блокировка не держится всё время разбора файла.
+    Возвращает (загрузка, всего строк, строк с ошибками формата).
+    """
+    if uploaded_file.name.endswith(".csv"):
+        rows = iter_csv_records(uploaded_file)
+    else:
+        rows = iter_ndjson_records(uploaded_file)
+
+    with transaction.atomic():
+        upload = DataSubmission.objects.create(
+            user=user,
+            channel=3,
+            file_upload=uploaded_file,
+            status="accepted",
+            validated_at=timezone.now(),
+        )
+        uploaded_file.seek(0)
+        total = invalid = 0
+        batch = []
+        deltas = Counter()
+        for row_number, record, error in rows:
+            total += 1
+            submission = DataSubmission(
+                user=user,
+                channel=3,
+                data=record,
+                source_file=upload,
+                row_number=row_number,
+                status="pending",
+            )
+            if error is not None:
+                invalid += 1
+                submission.status = "rejected"
+                submission.validation_errors = {"content": error}
+                submission.validated_at = timezone.now()
+            batch.append(submission)
+            if len(batch) >= OFFLINE_ROW_BATCH_SIZE:
+                bulk_save_submissions(batch, deltas)
+                batch = []
+        bulk_save_submissions(batch, deltas)
+        SubmissionCounter.apply(deltas)
+        if not total:
+            upload.status = "rejected"
+            upload.validation_errors = {"content": "Файл не содержит записей"}
+            upload.save()
+    return upload, total, invalid
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.archive import ARCHIVE_BATCH_SIZE, archive_batch, retention_cutoff
+
+
+class Command(BaseCommand):
+    """Перенос старых заявок данных в архив"""
+    help = (
+        "Переносит заявки данных старше срока хранения "
+        "(SUBMISSION_RETENTION_DAYS) в архив пакетами. Прерванный "
+        "перенос продолжается следующим запуском."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int, default=None,
+            help="Срок хранения в днях вместо SUBMISSION_RETENTION_DAYS",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=ARCHIVE_BATCH_SIZE,
+            help="Количество заявок в одной транзакции",
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=0.5,
+            help="Пауза в секундах между пакетами",
+        )
+        parser.add_argument(
+            "--max-batches", type=int, default=None,
+            help="Остановиться после указанного числа пакетов",
+        )
+
+    def handle(self, *args, **options):
+        # Граница фиксируется на весь запуск
+        cutoff = retention_cutoff(options["older_than_days"])
+        total = 0
+        batches = 0
+        while options["max_batches"] is None or (
+            batches < options["max_batches"]
+        ):
+            moved = archive_batch(cutoff, options["batch_size"])
+            if not moved:
+                break
+            total += moved
+            batches += 1
+            self.stdout.write(f"Перенесено заявок: {total}")
+            time.sleep(options["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Перенесено в архив: {total}")
+        )
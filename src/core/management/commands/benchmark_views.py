@@ -0,0 +1,126 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from core.benchmarks import (
+    DEFAULT_DATASET,
+    SCENARIOS,
+    compare_reports,
+    run_benchmarks,
+    seed_dataset,
+    server_errors,
+)
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+
+
+class Command(BaseCommand):
+    """Бенчмарки представлений с проверкой бюджетов"""
+    help = (
+        "Наполняет тестовую базу, прогоняет все маршруты core и "
+        "сравнивает время, число SQL-запросов и память с базовым отчётом"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument("--output", help="Куда записать отчёт JSON")
+        parser.add_argument("--update-baseline", action="store_true",
+                            help="Перезаписать базовый отчёт текущим")
+        parser.add_argument("--repeats", type=int, default=5)
+        parser.add_argument("--time-tolerance", type=float, default=2.0)
+        parser.add_argument("--memory-tolerance", type=float, default=1.5)
+        parser.add_argument("--scenario", action="append",
+                            choices=sorted(SCENARIOS),
+                            help="Прогнать только указанные сценарии")
+        for name, default in DEFAULT_DATASET.items():
+            parser.add_argument(f"--{name}", type=int, default=default)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] for name in DEFAULT_DATASET}
+        report = self.run(sizes, options)
+        report["dataset"] = sizes
+
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(text + "\n", encoding="utf-8")
+        self.print_report(report)
+
+        baseline_path = Path(options["baseline"])
+        if options["update_baseline"]:
+            errors = server_errors(report)
+            if errors:
+                # Ошибка сервера не может быть бюджетом
+                raise CommandError(
+                    "Базовый отчёт не обновлён, сценарии с ошибкой:\n"
+                    + "\n".join(errors)
+                )
+            if options["scenario"] and baseline_path.exists():
+                # Обновляются только прогнанные сценарии
+                baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+                baseline["views"].update(report["views"])
+                text = json.dumps(baseline, ensure_ascii=False, indent=2)
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(text + "\n", encoding="utf-8")
+            self.stdout.write(f"Базовый отчёт обновлён: {baseline_path}")
+            return
+        if not baseline_path.exists():
+            self.stdout.write(
+                f"Базовый отчёт {baseline_path} не найден, сравнение пропущено"
+            )
+            return
+
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if options["scenario"]:
+            baseline["views"] = {
+                name: budget for name, budget in baseline["views"].items()
+                if name in options["scenario"]
+            }
+        violations = compare_reports(
+            report, baseline,
+            time_tolerance=options["time_tolerance"],
+            memory_tolerance=options["memory_tolerance"],
+        )
+        if violations:
+            raise CommandError(
+                "Превышены бюджеты:\n" + "\n".join(violations)
+            )
+        self.stdout.write(self.style.SUCCESS("Бюджеты соблюдены"))
+
+    def run(self, sizes, options):
+        """Прогон на отдельной тестовой базе, рабочие данные не трогаются."""
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root):
+                users = seed_dataset(sizes)
+                return run_benchmarks(
+                    users, options["repeats"], options["scenario"]
+                )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+    def print_report(self, report):
+        for name, result in report["views"].items():
+            self.stdout.write(
+                f"{name:32} {result['status']:>3} "
+                f"{result['queries']:>4} SQL "
+                f"{result['time_ms']:>9.2f} мс "
+                f"{result['peak_kb']:>7} КБ"
+            )
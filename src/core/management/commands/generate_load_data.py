@@ -0,0 +1,260 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.counters import reconcile_counters
+from core.models import DataSubmission, Notification, Ticket
+from core.notifications import invalidate_l1_agents
+from core.queues import SUPPORT_LEVELS, bump_queue_versions
+from core.routing import route_ticket
+
+User = get_user_model()
+
+# Даты отсчитываются от фиксированного дня: с тем же --seed получается
+# тот же набор данных независимо от дня запуска
+DEFAULT_ANCHOR_DATE = "2026-01-01"
+
+
+def weights(value):
+    """Разбор распределения вида "ключ:вес,ключ:вес"."""
+    result = {}
+    try:
+        for item in value.split(","):
+            key, weight = item.split(":")
+            result[key.strip()] = float(weight)
+    except ValueError:
+        raise CommandError(f"Неверное распределение: {value!r}")
+    if not result or sum(result.values()) <= 0:
+        raise CommandError(f"Пустое распределение: {value!r}")
+    return result
+
+
+def anchor_date(value):
+    """Конец периода дат: полночь указанного дня (YYYY-MM-DD)."""
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Неверная дата: {value!r}")
+    return timezone.make_aware(datetime.combine(day, dt_time.min))
+
+
+@contextmanager
+def preserve_timestamps(model, field_name):
+    """Отключение auto_now_add, чтобы сохранить сгенерированные даты."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    """Синтетические данные для нагрузочного тестирования"""
+    help = (
+        "Создаёт большие объёмы пользователей, заявок данных, заявок "
+        "в поддержку и уведомлений пакетными вставками"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--submissions", type=int, default=100000)
+        parser.add_argument("--tickets", type=int, default=10000)
+        parser.add_argument("--notifications", type=int, default=100000)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=365,
+                            help="Период, по которому распределяются даты")
+        parser.add_argument(
+            "--anchor-date", default=DEFAULT_ANCHOR_DATE,
+            help="День, от которого назад отсчитывается период дат",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="load",
+                            help="Префикс имён пользователей")
+        parser.add_argument(
+            "--role-weights", type=weights,
+            default="respondent:0.8,provider:0.1,admin:0.02,support:0.08",
+        )
+        parser.add_argument(
+            "--support-level-weights", type=weights,
+            default="1:0.6,2:0.3,3:0.1",
+        )
+        parser.add_argument(
+            "--channel-weights", type=weights, default="1:0.5,2:0.3,3:0.2",
+        )
+        parser.add_argument(
+            "--status-weights", type=weights,
+            default="pending:0.1,accepted:0.8,rejected:0.1",
+        )
+        parser.add_argument(
+            "--category-weights", type=weights,
+            default=(
+                "schedule:0.2,api_issue:0.2,notification:0.3,"
+                "system_performance:0.1,response_time:0.1,other:0.1"
+            ),
+        )
+        parser.add_argument(
+            "--line-weights", type=weights, default="1:0.6,2:0.3,3:0.1",
+        )
+        parser.add_argument(
+            "--ticket-status-weights", type=weights,
+            default="open:0.4,in_progress:0.2,escalated:0.2,resolved:0.2",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.chunk_size = options["chunk_size"]
+        self.now = anchor_date(options["anchor_date"])
+        self.period = options["days"] * 24 * 60 * 60
+        started = time.monotonic()
+
+        users = self.create_users(options)
+        respondents = users.get("respondent") or users.get("provider") or []
+        authors = users.get("provider", []) + users.get("admin", [])
+        all_users = [pk for ids in users.values() for pk in ids]
+        if options["submissions"] and not respondents:
+            raise CommandError("Нет респондентов для заявок данных")
+        if (options["tickets"] or options["notifications"]) and not all_users:
+            raise CommandError("Нет пользователей для заявок и уведомлений")
+
+        self.create_submissions(options, respondents)
+        self.create_tickets(options, authors or all_users)
+        self.create_notifications(options, all_users)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово за {time.monotonic() - started:.1f} с"
+        ))
+
+    def random_moment(self):
+        return self.now - timedelta(seconds=self.rng.uniform(0, self.period))
+
+    def sample(self, distribution, count, cast=str):
+        keys = [cast(key) for key in distribution]
+        return self.rng.choices(keys, list(distribution.values()), k=count)
+
+    def chunks(self, total):
+        for start in range(0, total, self.chunk_size):
+            yield start, min(self.chunk_size, total - start)
+
+    def report(self, label, done, total):
+        self.stdout.write(f"{label}: {done}/{total}")
+
+    def create_users(self, options):
+        total = options["users"]
+        prefix = options["prefix"]
+        offset = User.objects.filter(username__startswith=prefix).count()
+        # Хэш пароля считается один раз: он одинаковый у всех
+        password = make_password("123")
+        users = {}
+        for start, size in self.chunks(total):
+            roles = self.sample(options["role_weights"], size)
+            levels = self.sample(options["support_level_weights"], size, int)
+            batch = [
+                User(
+                    username=f"{prefix}{offset + start + i}",
+                    password=password,
+                    role=role,
+                    support_level=levels[i] if role == "support" else None,
+                )
+                for i, role in enumerate(roles)
+            ]
+            User.objects.bulk_create(batch)
+            for user in batch:
+                users.setdefault(user.role, []).append(user.pk)
+            self.report("Пользователи", start + size, total)
+        # bulk_create не отправляет сигналы post_save
+        invalidate_l1_agents()
+        return users
+
+    def create_submissions(self, options, respondents):
+        total = options["submissions"]
+        with preserve_timestamps(DataSubmission, "submitted_at"):
+            for start, size in self.chunks(total):
+                channels = self.sample(options["channel_weights"], size, int)
+                statuses = self.sample(options["status_weights"], size)
+                batch = []
+                for channel, status in zip(channels, statuses):
+                    submitted_at = self.random_moment()
+                    student_id = self.rng.randint(1, 10 ** 6)
+                    submission = DataSubmission(
+                        channel=channel,
+                        status=status,
+                        data={
+                            "student_id": student_id,
+                            "name": f"Студент {student_id}",
+                            "score": self.rng.randint(0, 100),
+                        },
+                        submitted_at=submitted_at,
+                    )
+                    if channel == 1:
+                        submission.provider_name = (
+                            f"provider{self.rng.randint(1, 50)}"
+                        )
+                    else:
+                        submission.user_id = self.rng.choice(respondents)
+                    if status != "pending":
+                        submission.validated_at = submitted_at
+                    if status == "rejected":
+                        submission.validation_errors = {
+                            "name": "Обязательное поле"
+                        }
+                    batch.append(submission)
+                with transaction.atomic():
+                    DataSubmission.objects.bulk_create(batch)
+                self.report("Заявки данных", start + size, total)
+        if total:
+            # Даты разбросаны по всему периоду, поэтому счётчики
+            # дешевле пересчитать один раз, чем обновлять на каждом пакете
+            reconcile_counters()
+
+    def create_tickets(self, options, authors):
+        total = options["tickets"]
+        with preserve_timestamps(Ticket, "created_at"):
+            for start, size in self.chunks(total):
+                categories = self.sample(options["category_weights"], size)
+                lines = self.sample(options["line_weights"], size, int)
+                statuses = self.sample(options["ticket_status_weights"], size)
+                batch = []
+                for category, line, status in zip(categories, lines, statuses):
+                    if status == "escalated" and line == 1:
+                        line = 2
+                    batch.append(Ticket(
+                        subject=f"Нагрузочная заявка ({category})",
+                        description="Сгенерировано generate_load_data",
+                        user_id=self.rng.choice(authors),
+                        support_line=line,
+                        status=status,
+                        category=category,
+                        l3_watch=route_ticket(category, "form").l3_watch,
+                        created_at=self.random_moment(),
+                    ))
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(batch)
+                self.report("Заявки в поддержку", start + size, total)
+        if total:
+            # bulk_create не отправляет сигналы, сбрасывающие кэш очередей
+            bump_queue_versions(SUPPORT_LEVELS)
+
+    def create_notifications(self, options, recipients):
+        total = options["notifications"]
+        with preserve_timestamps(Notification, "created_at"):
+            for start, size in self.chunks(total):
+                batch = [
+                    Notification(
+                        user_id=self.rng.choice(recipients),
+                        message="Сгенерированное уведомление",
+                        is_read=self.rng.random() < 0.8,
+                        created_at=self.random_moment(),
+                    )
+                    for _ in range(size)
+                ]
+                with transaction.atomic():
+                    Notification.objects.bulk_create(batch)
+                self.report("Уведомления", start + size, total)
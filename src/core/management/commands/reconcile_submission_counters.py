@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """Сверка счётчиков заявок данных"""
+    help = (
+        "Пересчитывает таблицу SubmissionCounter по заявкам данных "
+        "и исправляет расхождения"
+    )
+
+    def handle(self, *args, **kwargs):
+        fixed = reconcile_counters()
+        self.stdout.write(
+            self.style.SUCCESS(f"Исправлено строк счётчиков: {fixed}")
+        )
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.dedup import purge_expired_fingerprints
+from core.validation import validate_pending_batch
+
+
+class Command(BaseCommand):
+    """Фоновая валидация заявок данных"""
+    help = (
+        "Обрабатывает заявки данных в статусе pending: проверяет их "
+        "и выставляет accepted/rejected. Можно запускать несколько "
+        "процессов одновременно (PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Количество заявок в одном пакете",
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=1.0,
+            help="Пауза в секундах, когда очередь пуста",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Обработать очередь и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = validate_pending_batch(options["batch_size"])
+            total += processed
+            if processed:
+                continue
+            # Очередь пуста: время убрать просроченные отпечатки повторов
+            purge_expired_fingerprints()
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Обработано заявок: {total}")
+        )
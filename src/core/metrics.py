@@ -0,0 +1,163 @@
+"""Метрики Prometheus.
+
+Метрики хранятся в prometheus_client: обновление — это атомарная
+операция над значением в памяти процесса без блокировок БД. Для
+нескольких процессов (воркеры uvicorn/gunicorn, validate_submissions)
+задаётся переменная окружения PROMETHEUS_MULTIPROC_DIR — общий каталог,
+куда каждый процесс пишет свои значения, а эндпоинт /metrics/
+суммирует их при чтении.
+"""
+import os
+
+from django.db import connections, transaction
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+CHANNEL_LABELS = {1: "api", 2: "online", 3: "offline"}
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса по имени маршрута",
+    ["view", "method"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+SUBMISSIONS = Counter(
+    "data_submissions",
+    "Заявки данных, перешедшие в статус, по каналам",
+    ["channel", "status"],
+)
+TICKETS_CREATED = Counter(
+    "tickets_created",
+    "Созданные заявки в поддержку",
+    ["category", "support_line"],
+)
+NOTIFICATION_FANOUT = Histogram(
+    "notification_fanout_recipients",
+    "Число получателей одной пакетной рассылки уведомлений",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000),
+)
+
+
+def observe_request(view, method, seconds):
+    REQUEST_LATENCY.labels(view, method).observe(seconds)
+
+
+def record_submissions(deltas):
+    """Учёт переходов заявок в статус после коммита транзакции.
+
+    deltas — изменения счётчиков {(канал, статус, день): дельта};
+    положительная дельта означает заявки, получившие этот статус.
+    """
+    totals = {}
+    for (channel, status, _), delta in deltas.items():
+        if delta > 0:
+            key = CHANNEL_LABELS.get(channel, str(channel)), status
+            totals[key] = totals.get(key, 0) + delta
+    if not totals:
+        return
+
+    def publish():
+        for (channel, status), count in totals.items():
+            SUBMISSIONS.labels(channel, status).inc(count)
+
+    transaction.on_commit(publish)
+
+
+def record_ticket_created(ticket):
+    TICKETS_CREATED.labels(ticket.category, str(ticket.support_line)).inc()
+
+
+def record_fanout(recipients):
+    NOTIFICATION_FANOUT.observe(recipients)
+
+
+class PoolCollector:
+    """Состояние пулов соединений psycopg текущего процесса.
+
+    Значения читаются из pool.get_stats() в момент опроса, поэтому на
+    выдачу соединений сбор метрик не влияет.
+    """
+
+    def describe(self):
+        # Без describe() реестр вызвал бы collect() при регистрации,
+        # то есть создал бы пул ещё при импорте модуля
+        return []
+
+    def collect(self):
+        gauges = {
+            "size": GaugeMetricFamily(
+                "db_pool_connections", "Открытые соединения пула",
+                labels=["alias"],
+            ),
+            "in_use": GaugeMetricFamily(
+                "db_pool_connections_in_use", "Выданные соединения пула",
+                labels=["alias"],
+            ),
+            "waiting": GaugeMetricFamily(
+                "db_pool_requests_waiting",
+                "Запросы, ожидающие соединения", labels=["alias"],
+            ),
+        }
+        counters = {
+            "requests": CounterMetricFamily(
+                "db_pool_requests", "Выдачи соединений из пула",
+                labels=["alias"],
+            ),
+            "wait": CounterMetricFamily(
+                "db_pool_wait_seconds",
+                "Суммарное время ожидания соединения", labels=["alias"],
+            ),
+            "errors": CounterMetricFamily(
+                "db_pool_errors",
+                "Запросы соединения, завершившиеся ошибкой или таймаутом",
+                labels=["alias"],
+            ),
+        }
+        for alias in connections:
+            pool = getattr(connections[alias], "pool", None)
+            if pool is None:
+                continue
+            stats = pool.get_stats()
+            size = stats.get("pool_size", 0)
+            gauges["size"].add_metric([alias], size)
+            gauges["in_use"].add_metric(
+                [alias], size - stats.get("pool_available", 0)
+            )
+            gauges["waiting"].add_metric(
+                [alias], stats.get("requests_waiting", 0)
+            )
+            counters["requests"].add_metric(
+                [alias], stats.get("requests_num", 0)
+            )
+            counters["wait"].add_metric(
+                [alias], stats.get("requests_wait_ms", 0) / 1000
+            )
+            counters["errors"].add_metric(
+                [alias], stats.get("requests_errors", 0)
+            )
+        yield from gauges.values()
+        yield from counters.values()
+
+
+POOL_COLLECTOR = PoolCollector()
+REGISTRY.register(POOL_COLLECTOR)
+
+
+def collect():
+    """Текст метрик в формате Prometheus и его Content-Type."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Пул у каждого процесса свой: показывается пул отвечающего
+        registry.register(POOL_COLLECTOR)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
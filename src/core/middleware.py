@@ -0,0 +1,203 @@
+import logging
+import re
+import time
+from collections import Counter
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.db import connection
+
+from .metrics import observe_request
+
+logger = logging.getLogger("core.sql")
+
+# Списки параметров разной длины дают один и тот же отпечаток
+IN_LIST = re.compile(r"\((?:%s|\?)(?:,\s*(?:%s|\?))*\)")
+NUMBER = re.compile(r"\b\d+\b")
+
+DEFAULT_DUPLICATE_THRESHOLD = 5
+
+
+def fingerprint(sql):
+    """Отпечаток SQL: запрос без конкретных значений."""
+    return NUMBER.sub("N", IN_LIST.sub("(...)", sql))
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем объявлено."""
+
+
+class QueryStats:
+    """Счётчик запросов и времени БД для connection.execute_wrapper.
+
+    На каждый запрос приходится лишь замер времени и увеличение счётчика
+    по тексту SQL; отпечатки считаются один раз в конце запроса.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """Отпечатки, повторившиеся не менее threshold раз."""
+        fingerprints = Counter()
+        for sql, count in self.statements.items():
+            fingerprints[fingerprint(sql)] += count
+        return {
+            sql: count for sql, count in fingerprints.most_common()
+            if count >= threshold
+        }
+
+
+class QueryCountMiddleware:
+    """Учёт SQL-запросов на каждый HTTP-запрос.
+
+    Добавляет заголовок Server-Timing с числом запросов и временем БД,
+    пишет структурированную запись в лог core.sql, отмечает повторяющиеся
+    запросы (признак N+1) и проверяет бюджет, объявленный декоратором
+    query_budget. При QUERY_BUDGET_STRICT превышение бюджета — ошибка,
+    иначе только предупреждение в логе.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = QueryStats()
+        started = time.perf_counter()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        if getattr(request, "track_queries", True):
+            self.report(
+                request, response, stats, time.perf_counter() - started
+            )
+        return response
+
+    async def __acall__(self, request):
+        # Под ASGI синхронные представления работают в отдельном потоке
+        # со своим соединением; обёртка ставится в том же потоке
+        stats = QueryStats()
+        started = time.perf_counter()
+        await sync_to_async(self.install)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(self.uninstall)(stats)
+        if getattr(request, "track_queries", True):
+            self.report(
+                request, response, stats, time.perf_counter() - started
+            )
+        return response
+
+    @staticmethod
+    def install(stats):
+        connection.execute_wrappers.append(stats)
+
+    @staticmethod
+    def uninstall(stats):
+        connection.execute_wrappers.remove(stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, "query_budget", None)
+        request.track_queries = getattr(view_func, "track_queries", True)
+        request.view_name = getattr(
+            view_func, "__qualname__", view_func.__class__.__name__
+        )
+
+    def report(self, request, response, stats, elapsed):
+        threshold = getattr(
+            settings, "SQL_DUPLICATE_THRESHOLD", DEFAULT_DUPLICATE_THRESHOLD
+        )
+        duplicates = stats.duplicates(threshold)
+        budget = getattr(request, "query_budget", None)
+        view = getattr(request, "view_name", None)
+
+        timing = [
+            f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"',
+            f"app;dur={elapsed * 1000:.1f}",
+        ]
+        if duplicates:
+            timing.append(f'db-dup;desc="{max(duplicates.values())} repeats"')
+        response.headers["Server-Timing"] = ", ".join(timing)
+
+        fields = {
+            "view": view,
+            "path": request.path,
+            "method": request.method,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 2),
+            "total_ms": round(elapsed * 1000, 2),
+            "query_budget": budget,
+            "duplicates": duplicates,
+        }
+        logger.info(
+            "%s %s: %d SQL-запросов, %.1f мс в БД",
+            request.method, request.path, stats.count,
+            stats.duration * 1000, extra={"sql": fields},
+        )
+        if duplicates:
+            logger.warning(
+                "%s: повторяющиеся SQL-запросы (возможен N+1): %s",
+                view, duplicates, extra={"sql": fields},
+            )
+        if budget is not None and stats.count > budget:
+            message = (
+                f"{view}: {stats.count} SQL-запросов "
+                f"при бюджете {budget}"
+            )
+            if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message, extra={"sql": fields})
+
+
+class MetricsMiddleware:
+    """Гистограмма времени ответа по имени маршрута."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, seconds):
+        match = getattr(request, "resolver_match", None)
+        view = match.url_name if match and match.url_name else "unmatched"
+        observe_request(view, request.method, seconds)
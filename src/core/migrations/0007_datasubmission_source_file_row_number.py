@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_datasubmission_validation_errors_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datasubmission",
+            name="row_number",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Номер строки"
+            ),
+        ),
+        migrations.AddField(
+            model_name="datasubmission",
+            name="source_file",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="records",
+                to="core.datasubmission",
+                verbose_name="Исходный файл",
+            ),
+        ),
+    ]
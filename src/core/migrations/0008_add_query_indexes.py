@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_datasubmission_source_file_row_number"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                fields=["-submitted_at"], name="submission_submitted_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                fields=["channel", "-submitted_at"], name="submission_channel_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                fields=["status", "-submitted_at"], name="submission_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                fields=["channel", "status", "-submitted_at"],
+                name="submission_channel_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["id"],
+                name="submission_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-created_at"], name="notification_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("is_read", False)),
+                fields=["user", "-created_at"],
+                name="notification_unread_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["support_line", "status", "-created_at"],
+                name="ticket_line_status_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__in", ["new", "open", "in_progress", "escalated"])
+                ),
+                fields=["support_line", "-created_at"],
+                name="ticket_open_line_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["category"], name="ticket_category_idx"),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_add_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="datasubmission",
+            name="submission_submitted_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="datasubmission",
+            name="submission_channel_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="datasubmission",
+            name="submission_status_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="datasubmission",
+            name="submission_channel_status_idx",
+        ),
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                fields=["-submitted_at", "-id"], name="submission_submitted_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                fields=["channel", "-submitted_at", "-id"],
+                name="submission_channel_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                fields=["status", "-submitted_at", "-id"], name="submission_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datasubmission",
+            index=models.Index(
+                fields=["channel", "status", "-submitted_at", "-id"],
+                name="submission_channel_status_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:29
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def fill_counters(apps, schema_editor):
+    DataSubmission = apps.get_model("core", "DataSubmission")
+    SubmissionCounter = apps.get_model("core", "SubmissionCounter")
+    rows = (
+        DataSubmission.objects.annotate(day=TruncDate("submitted_at"))
+        .values("channel", "status", "day")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    SubmissionCounter.objects.bulk_create(
+        [SubmissionCounter(**row) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_keyset_submission_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubmissionCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "channel",
+                    models.IntegerField(
+                        choices=[(1, "API"), (2, "Онлайн-ввод"), (3, "Оффлайн-ввод")]
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Ожидает валидации"),
+                            ("accepted", "Принято"),
+                            ("rejected", "Отклонено"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("total", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("channel", "status", "day"),
+                        name="submission_counter_key",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+# Прежние жёстко заданные обязательные поля по каналам: только наличие,
+# проверки типов и диапазонов добавляются отдельно через админку
+DEFAULT_SCHEMAS = {
+    1: {"name": {"required": True}},
+    2: {"student_id": {"required": True}, "name": {"required": True}},
+    3: {"student_id": {"required": True}},
+}
+
+
+def create_schemas(apps, schema_editor):
+    ValidationSchema = apps.get_model("core", "ValidationSchema")
+    ValidationSchema.objects.bulk_create([
+        ValidationSchema(channel=channel, fields=fields)
+        for channel, fields in DEFAULT_SCHEMAS.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_submissioncounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ValidationSchema",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "channel",
+                    models.IntegerField(
+                        choices=[(1, "API"), (2, "Онлайн-ввод"), (3, "Оффлайн-ввод")],
+                        unique=True,
+                        verbose_name="Канал",
+                    ),
+                ),
+                ("fields", models.JSONField(default=dict, verbose_name="Поля")),
+                (
+                    "is_active",
+                    models.BooleanField(default=True, verbose_name="Активна"),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_schemas, migrations.RunPython.noop),
+    ]
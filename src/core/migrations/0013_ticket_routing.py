@@ -0,0 +1,138 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+# Прежняя жёстко заданная маршрутизация:
+# (категория, источник, линия, статус, видна L3)
+DEFAULT_RULES = [
+    ("", "", 1, "new", False),
+    ("api_issue", "", 2, "escalated", False),
+    ("system_performance", "", 2, "escalated", True),
+    ("response_time", "", 1, "new", True),
+]
+
+
+def create_rules(apps, schema_editor):
+    RoutingRule = apps.get_model("core", "RoutingRule")
+    Ticket = apps.get_model("core", "Ticket")
+    RoutingRule.objects.bulk_create([
+        RoutingRule(category=category, source=source, support_line=line,
+                    status=status, l3_watch=l3_watch)
+        for category, source, line, status, l3_watch in DEFAULT_RULES
+    ])
+    Ticket.objects.filter(
+        category__in=[rule[0] for rule in DEFAULT_RULES if rule[4]]
+    ).update(l3_watch=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_submissionfingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoutingRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "category",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("schedule", "Изменение расписания"),
+                            ("api_issue", "Проблема с API"),
+                            ("notification", "Не понимаю уведомление"),
+                            ("system_performance", "Система работает медленно"),
+                            ("response_time", "Медленный ответ техподдержки"),
+                            ("other", "Другое"),
+                        ],
+                        max_length=20,
+                        verbose_name="Категория",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("form", "Форма заявки"),
+                            ("upload", "Загрузка файла"),
+                        ],
+                        max_length=20,
+                        verbose_name="Источник",
+                    ),
+                ),
+                (
+                    "support_line",
+                    models.IntegerField(
+                        choices=[
+                            (1, "Первая линия"),
+                            (2, "Вторая линия"),
+                            (3, "Третья линия"),
+                        ],
+                        default=1,
+                        verbose_name="Линия",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        default="new", max_length=20, verbose_name="Начальный статус"
+                    ),
+                ),
+                (
+                    "l3_watch",
+                    models.BooleanField(default=False, verbose_name="Видна L3"),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(default=True, verbose_name="Активно"),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="ticket",
+            name="ticket_category_idx",
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="l3_watch",
+            field=models.BooleanField(default=False, verbose_name="Видна L3"),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="source",
+            field=models.CharField(
+                choices=[("form", "Форма заявки"), ("upload", "Загрузка файла")],
+                default="form",
+                max_length=20,
+                verbose_name="Источник",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("l3_watch", True)),
+                fields=["-created_at"],
+                name="ticket_l3_watch_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="routingrule",
+            constraint=models.UniqueConstraint(
+                fields=("category", "source"), name="routing_rule_unique"
+            ),
+        ),
+        migrations.RunPython(create_rules, migrations.RunPython.noop),
+    ]
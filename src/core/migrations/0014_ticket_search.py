@@ -0,0 +1,86 @@
+from django.db import migrations
+
+# PostgreSQL: хранимая колонка и GIN-индекс
+POSTGRES_INDEX_SQL = [
+    """
+    ALTER TABLE core_ticket ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(subject, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ticket_search_idx ON core_ticket "
+    "USING GIN (search_vector)",
+]
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS ticket_search_idx",
+    "ALTER TABLE core_ticket DROP COLUMN IF EXISTS search_vector",
+]
+# SQLite: таблица FTS5 с внешним содержимым и триггеры. После migrate
+# триггеры восстанавливает core.search.restore_search_triggers
+SQLITE_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS core_ticket_fts USING fts5(
+        subject, description,
+        content='core_ticket', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_ticket_fts_insert
+    AFTER INSERT ON core_ticket BEGIN
+        INSERT INTO core_ticket_fts(rowid, subject, description)
+        VALUES (new.id, new.subject, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_ticket_fts_delete
+    AFTER DELETE ON core_ticket BEGIN
+        INSERT INTO core_ticket_fts(core_ticket_fts, rowid, subject,
+                                    description)
+        VALUES ('delete', old.id, old.subject, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_ticket_fts_update
+    AFTER UPDATE OF subject, description ON core_ticket BEGIN
+        INSERT INTO core_ticket_fts(core_ticket_fts, rowid, subject,
+                                    description)
+        VALUES ('delete', old.id, old.subject, old.description);
+        INSERT INTO core_ticket_fts(rowid, subject, description)
+        VALUES (new.id, new.subject, new.description);
+    END
+    """,
+    "INSERT INTO core_ticket_fts(core_ticket_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_ticket_fts_insert",
+    "DROP TRIGGER IF EXISTS core_ticket_fts_delete",
+    "DROP TRIGGER IF EXISTS core_ticket_fts_update",
+    "DROP TABLE IF EXISTS core_ticket_fts",
+]
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        statements = {"postgresql": postgresql, "sqlite": sqlite}
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    """Полнотекстовый индекс заявок: зависит от СУБД, поэтому вне модели"""
+
+    dependencies = [
+        ("core", "0013_ticket_routing"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_INDEX_SQL, SQLITE_INDEX_SQL),
+            run_for_vendor(POSTGRES_DROP_SQL, SQLITE_DROP_SQL),
+        ),
+    ]
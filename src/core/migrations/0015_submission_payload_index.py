@@ -0,0 +1,90 @@
+from django.db import migrations
+
+# Индексируется ключ student_id (значение SUBMISSION_PAYLOAD_KEYS по
+# умолчанию). При другой настройке триггеры пересобирает
+# core.payload_index.refresh_payload_index после migrate
+POSTGRES_INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS submission_data_gin_idx "
+    "ON core_datasubmission USING GIN (data jsonb_path_ops)",
+]
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS submission_data_gin_idx",
+]
+SQLITE_INDEX_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS core_submission_payload_key (
+        key text NOT NULL,
+        value text NOT NULL,
+        submission_id integer NOT NULL,
+        PRIMARY KEY (key, value, submission_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS core_submission_payload_key_submission_idx "
+    "ON core_submission_payload_key (submission_id)",
+    # Текст триггеров совпадает с core.payload_index.sqlite_triggers_sql,
+    # иначе post_migrate пересоберёт индекс повторно
+    "\n        CREATE TRIGGER core_submission_payload_insert\n"
+    "        AFTER INSERT ON core_datasubmission WHEN new.data IS NOT NULL "
+    "BEGIN\n"
+    "            INSERT INTO core_submission_payload_key "
+    "(key, value, submission_id) "
+    "SELECT payload.key, CAST(payload.value AS TEXT), new.id "
+    "FROM json_each(new.data) AS payload "
+    "WHERE payload.key IN ('student_id') "
+    "AND payload.type IN ('integer', 'real', 'text');\n"
+    "        END\n        ",
+    "\n        CREATE TRIGGER core_submission_payload_update\n"
+    "        AFTER UPDATE OF data ON core_datasubmission BEGIN\n"
+    "            DELETE FROM core_submission_payload_key "
+    "WHERE submission_id = old.id;\n"
+    "            INSERT INTO core_submission_payload_key "
+    "(key, value, submission_id) "
+    "SELECT payload.key, CAST(payload.value AS TEXT), new.id "
+    "FROM json_each(new.data) AS payload "
+    "WHERE payload.key IN ('student_id') "
+    "AND payload.type IN ('integer', 'real', 'text');\n"
+    "        END\n        ",
+    "\n        CREATE TRIGGER core_submission_payload_delete\n"
+    "        AFTER DELETE ON core_datasubmission BEGIN\n"
+    "            DELETE FROM core_submission_payload_key "
+    "WHERE submission_id = old.id;\n"
+    "        END\n        ",
+    # Заполнение по уже сохранённым заявкам
+    "INSERT INTO core_submission_payload_key (key, value, submission_id) "
+    "SELECT payload.key, CAST(payload.value AS TEXT), submission.id "
+    "FROM core_datasubmission AS submission, "
+    "json_each(submission.data) AS payload "
+    "WHERE payload.key IN ('student_id') "
+    "AND payload.type IN ('integer', 'real', 'text')",
+]
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_submission_payload_insert",
+    "DROP TRIGGER IF EXISTS core_submission_payload_update",
+    "DROP TRIGGER IF EXISTS core_submission_payload_delete",
+    "DROP TABLE IF EXISTS core_submission_payload_key",
+]
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        statements = {"postgresql": postgresql, "sqlite": sqlite}
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    """Индекс ключевых полей data заявок: зависит от СУБД, поэтому вне модели"""
+
+    dependencies = [
+        ("core", "0014_ticket_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_INDEX_SQL, SQLITE_INDEX_SQL),
+            run_for_vendor(POSTGRES_DROP_SQL, SQLITE_DROP_SQL),
+        ),
+    ]
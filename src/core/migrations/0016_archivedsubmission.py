@@ -0,0 +1,133 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# PostgreSQL: та же таблица, разбитая на секции по submitted_at.
+# Первичный ключ секционированной таблицы включает ключ разбиения;
+# секции по месяцам создаёт core.archive при переносе.
+POSTGRES_PARTITIONED_SQL = [
+    "DROP TABLE core_archivedsubmission",
+    """
+    CREATE TABLE core_archivedsubmission (
+        id bigint NOT NULL,
+        user_id bigint NULL REFERENCES core_user (id)
+            DEFERRABLE INITIALLY DEFERRED,
+        provider_name varchar(255) NOT NULL,
+        channel integer NOT NULL,
+        data jsonb NULL,
+        file_upload varchar(100) NULL,
+        status varchar(10) NOT NULL,
+        submitted_at timestamp with time zone NOT NULL,
+        validated_at timestamp with time zone NULL,
+        rejection_reason text NOT NULL,
+        validation_errors jsonb NOT NULL,
+        source_file_id bigint NULL,
+        row_number integer NULL CHECK (row_number >= 0),
+        archived_at timestamp with time zone NOT NULL,
+        PRIMARY KEY (id, submitted_at)
+    ) PARTITION BY RANGE (submitted_at)
+    """,
+    "CREATE INDEX archived_submitted_idx "
+    "ON core_archivedsubmission (submitted_at DESC, id DESC)",
+    "CREATE INDEX core_archivedsubmission_user_id_idx "
+    "ON core_archivedsubmission (user_id)",
+]
+
+
+def partition_archive(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in POSTGRES_PARTITIONED_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_submission_payload_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedSubmission",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "provider_name",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Имя поставщика"
+                    ),
+                ),
+                (
+                    "channel",
+                    models.IntegerField(
+                        choices=[(1, "API"), (2, "Онлайн-ввод"), (3, "Оффлайн-ввод")]
+                    ),
+                ),
+                ("data", models.JSONField(blank=True, null=True)),
+                (
+                    "file_upload",
+                    models.FileField(blank=True, null=True, upload_to="submissions/"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Ожидает валидации"),
+                            ("accepted", "Принято"),
+                            ("rejected", "Отклонено"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("submitted_at", models.DateTimeField()),
+                ("validated_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "rejection_reason",
+                    models.TextField(blank=True, verbose_name="Причина отклонения"),
+                ),
+                (
+                    "validation_errors",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Ошибки валидации"
+                    ),
+                ),
+                (
+                    "source_file_id",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="Исходный файл"
+                    ),
+                ),
+                (
+                    "row_number",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Номер строки"
+                    ),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(verbose_name="Перенесена в архив"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_submissions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-submitted_at", "-id"], name="archived_submitted_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(partition_archive, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:54
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_totals(apps, schema_editor):
+    SubmissionCounter = apps.get_model("core", "SubmissionCounter")
+    SubmissionTotal = apps.get_model("core", "SubmissionTotal")
+    rows = (
+        SubmissionCounter.objects.values("channel", "status")
+        .annotate(total=Sum("total"))
+        .order_by()
+    )
+    SubmissionTotal.objects.bulk_create(
+        [SubmissionTotal(**row) for row in rows]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_archivedsubmission"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubmissionTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "channel",
+                    models.IntegerField(
+                        choices=[(1, "API"), (2, "Онлайн-ввод"), (3, "Оффлайн-ввод")]
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Ожидает валидации"),
+                            ("accepted", "Принято"),
+                            ("rejected", "Отклонено"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("total", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("channel", "status"), name="submission_total_key"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
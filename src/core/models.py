@@ -1,6 +1,12 @@
-from django.db import models
+from collections import Counter
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
 from django.forms import ValidationError
+from django.utils import timezone
+
+from .metrics import record_submissions
 
 ROLE_CHOICES = (
     ("respondent", "Респондент"),
@@ -15,6 +21,8 @@ SUPPORT_LEVEL_CHOICES = (
     (3, "L3"),
 )
 
+TICKET_OPEN_STATUSES = ["new", "open", "in_progress", "escalated"]
+
 
 class User(AbstractUser):
     """Модель пользователя."""
@@ -57,6 +65,10 @@ class Ticket(models.Model):
         ("response_time", "Медленный ответ техподдержки"),
         ("other", "Другое"),
     )
+    SOURCE_CHOICES = (
+        ("form", "Форма заявки"),
+        ("upload", "Загрузка файла"),
+    )
 
     subject = models.CharField(max_length=255)
     status = models.CharField(max_length=20,
@@ -71,6 +83,30 @@ class Ticket(models.Model):
     category = models.CharField(
         "Категория", max_length=20, choices=CATEGORY_CHOICES, default="other"
     )
+    source = models.CharField(
+        "Источник", max_length=20, choices=SOURCE_CHOICES, default="form"
+    )
+    # Заявка видна L3 независимо от линии; задаётся маршрутизацией
+    l3_watch = models.BooleanField("Видна L3", default=False)
+
+    class Meta:
+        indexes = [
+            # Очереди L1/L2: линия + статус, сортировка по дате
+            models.Index(fields=["support_line", "status", "-created_at"],
+                         name="ticket_line_status_created_idx"
+                         ),
+            # Открытые заявки линии
+            models.Index(fields=["support_line", "-created_at"],
+                         name="ticket_open_line_idx",
+                         condition=models.Q(
+                             status__in=TICKET_OPEN_STATUSES
+                         )
+                         ),
+            # Очередь L3: заявки третьей линии и отмеченные для L3
+            models.Index(fields=["-created_at"], name="ticket_l3_watch_idx",
+                         condition=models.Q(l3_watch=True)
+                         ),
+        ]
 
     def __str__(self):
         return (
@@ -78,6 +114,13 @@ class Ticket(models.Model):
         )
 
 
+# Файлы офлайн-загрузки, которые разбираются на заявки построчно
+OFFLINE_STREAM_EXTENSIONS = (".csv", ".ndjson", ".jsonl")
+
+# Поля заявки, из которых складывается ключ SubmissionCounter
+COUNTER_FIELDS = ("channel", "status", "submitted_at")
+
+
 class DataSubmission(models.Model):
     """Модель для хранения данных заявки."""
 
@@ -114,6 +157,41 @@ class DataSubmission(models.Model):
                                          default=dict,
                                          blank=True
                                          )
+    source_file = models.ForeignKey("self",
+                                    verbose_name="Исходный файл",
+                                    on_delete=models.CASCADE,
+                                    related_name="records",
+                                    null=True,
+                                    blank=True
+                                    )
+    row_number = models.PositiveIntegerField("Номер строки",
+                                             null=True,
+                                             blank=True
+                                             )
+
+    class Meta:
+        indexes = [
+            # Мониторинг в admin_dashboard: фильтры канал/статус,
+            # сортировка по дате поступления
+            models.Index(fields=["-submitted_at", "-id"],
+                         name="submission_submitted_idx"
+                         ),
+            models.Index(fields=["channel", "-submitted_at", "-id"],
+                         name="submission_channel_idx"
+                         ),
+            models.Index(fields=["status", "-submitted_at", "-id"],
+                         name="submission_status_idx"
+                         ),
+            models.Index(
+                fields=["channel", "status", "-submitted_at", "-id"],
+                name="submission_channel_status_idx"
+            ),
+            # Очередь validate_submissions
+            models.Index(fields=["id"],
+                         name="submission_pending_idx",
+                         condition=models.Q(status="pending")
+                         ),
+        ]
 
     def clean(self):
         """Корректность"""
@@ -123,21 +201,284 @@ class DataSubmission(models.Model):
             if not isinstance(self.data, dict):
                 raise ValidationError("Поле 'data' должно быть объектом.")
 
-            if "name" not in self.data:
-                self.validation_errors = {"name": "Обязательное поле"}
-            else:
-                self.validation_errors = {}
-        elif self.channel == 3:
-            self.validation_errors = {}
+    @property
+    def is_upload_file(self):
+        """Файл построчной загрузки: заявками считаются его строки."""
+        return bool(self.file_upload) and self.file_upload.name.endswith(
+            OFFLINE_STREAM_EXTENSIONS
+        )
 
     def save(self, *args, **kwargs):
-        """Сохранение"""
+        """Сохранение.
+
+        Обязательные поля здесь не проверяются: новые записи остаются в
+        статусе pending до обработки командой validate_submissions.
+        Счётчики SubmissionCounter обновляются в той же транзакции.
+        """
         self.full_clean()
-        if self.validation_errors:
-            self.status = "rejected"
-        else:
-            self.status = "accepted"
-        super().save(*args, **kwargs)
+        if self.is_upload_file:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            deltas = Counter()
+            previous = self.previous_counter_fields()
+            if previous is not None:
+                deltas[SubmissionCounter.key(*previous)] -= 1
+            super().save(*args, **kwargs)
+            deltas[SubmissionCounter.key_for(self)] += 1
+            SubmissionCounter.apply(deltas)
+        self.remember_counter_fields()
+
+    def remember_counter_fields(self):
+        """Запоминание канала, статуса и даты для пересчёта счётчиков.
+
+        Вызывается при загрузке из БД (post_init) и после сохранения.
+        Отложенные поля (only/defer) не читаются.
+        """
+        self._counter_fields = tuple(
+            self.__dict__.get(field) for field in COUNTER_FIELDS
+        )
+
+    def previous_counter_fields(self):
+        """Ключ счётчика сохранённой версии или None для новой заявки."""
+        if self._state.adding or self.pk is None:
+            return None
+        previous = getattr(self, "_counter_fields", None)
+        if previous is None or None in previous:
+            # Поля были отложены при загрузке: читаем их из БД
+            previous = (
+                DataSubmission.objects.filter(pk=self.pk)
+                .values_list(*COUNTER_FIELDS)
+                .first()
+            )
+        return previous
+
+
+class SubmissionFingerprint(models.Model):
+    """Отпечаток принятой записи API для поиска повторов.
+
+    key — либо хэш содержимого (provider_name, data), либо ключ из
+    заголовка Idempotency-Key. Уникальность key гарантирует, что при
+    параллельных повторах запись создаётся только один раз; после
+    expires_at отпечаток больше не считается повтором.
+    """
+
+    key = models.CharField(max_length=80, unique=True)
+    content_hash = models.CharField(max_length=64)
+    submission = models.ForeignKey(DataSubmission,
+                                   on_delete=models.CASCADE,
+                                   related_name="fingerprints"
+                                   )
+    expires_at = models.DateTimeField(db_index=True)
+
+
+class ValidationSchema(models.Model):
+    """Схема валидации данных заявок канала.
+
+    fields описывает поля записи: {"поле": {"required": true,
+    "type": "integer", "min": 1}}; формат правил — в core/schemas.py.
+    """
+
+    channel = models.IntegerField("Канал",
+                                  choices=DataSubmission.CHANNEL_CHOICES,
+                                  unique=True
+                                  )
+    fields = models.JSONField("Поля", default=dict)
+    is_active = models.BooleanField("Активна", default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def clean(self):
+        from .schemas import compile_schema
+
+        try:
+            compile_schema(self.fields)
+        except ValidationError as exc:
+            raise ValidationError({"fields": exc.messages})
+
+    def __str__(self):
+        return f"Схема: {self.get_channel_display()}"
+
+
+class ArchivedSubmission(models.Model):
+    """Заявка данных, перенесённая из DataSubmission по сроку хранения.
+
+    Поля повторяют DataSubmission; на PostgreSQL таблица разбита на
+    месячные секции по submitted_at (core/archive.py), поэтому запросы
+    за период читают только нужные секции.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name="archived_submissions",
+                             null=True,
+                             blank=True
+                             )
+    provider_name = models.CharField("Имя поставщика",
+                                     max_length=255,
+                                     blank=True
+                                     )
+    channel = models.IntegerField(choices=DataSubmission.CHANNEL_CHOICES)
+    data = models.JSONField(blank=True, null=True)
+    file_upload = models.FileField(upload_to="submissions/",
+                                   null=True,
+                                   blank=True
+                                   )
+    status = models.CharField(max_length=10,
+                              choices=DataSubmission.STATUS_CHOICES
+                              )
+    submitted_at = models.DateTimeField()
+    validated_at = models.DateTimeField(null=True, blank=True)
+    rejection_reason = models.TextField("Причина отклонения", blank=True)
+    validation_errors = models.JSONField("Ошибки валидации",
+                                        default=dict,
+                                        blank=True
+                                        )
+    # Исходный файл мог уйти в архив другим пакетом: ссылка без FK
+    source_file_id = models.BigIntegerField("Исходный файл",
+                                            null=True,
+                                            blank=True
+                                            )
+    row_number = models.PositiveIntegerField("Номер строки",
+                                             null=True,
+                                             blank=True
+                                             )
+    archived_at = models.DateTimeField("Перенесена в архив")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-submitted_at", "-id"],
+                         name="archived_submitted_idx"
+                         ),
+        ]
+
+    def __str__(self):
+        return f"Архив #{self.id} ({self.get_channel_display()})"
+
+
+class RoutingRule(models.Model):
+    """Правило маршрутизации новой заявки.
+
+    Пустые категория и источник подходят к любому значению; из
+    подходящих правил применяется самое точное (core/routing.py).
+    """
+
+    category = models.CharField("Категория",
+                                max_length=20,
+                                choices=Ticket.CATEGORY_CHOICES,
+                                blank=True
+                                )
+    source = models.CharField("Источник",
+                              max_length=20,
+                              choices=Ticket.SOURCE_CHOICES,
+                              blank=True
+                              )
+    support_line = models.IntegerField("Линия",
+                                       choices=Ticket.SUPPORT_LINE_CHOICES,
+                                       default=1
+                                       )
+    status = models.CharField("Начальный статус", max_length=20,
+                              default="new"
+                              )
+    l3_watch = models.BooleanField("Видна L3", default=False)
+    is_active = models.BooleanField("Активно", default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["category", "source"],
+                                    name="routing_rule_unique"
+                                    ),
+        ]
+
+    def __str__(self):
+        category = self.get_category_display() or "любая категория"
+        source = self.get_source_display() or "любой источник"
+        return f"{category}, {source} → L{self.support_line}"
+
+
+class SubmissionCounter(models.Model):
+    """Количество заявок данных по каналу, статусу и дню.
+
+    Поддерживается инкрементально при сохранении и удалении заявок и в
+    пакетных путях приёма/валидации; расхождения (например, после
+    прямых UPDATE) исправляет команда reconcile_submission_counters.
+    """
+
+    channel = models.IntegerField(choices=DataSubmission.CHANNEL_CHOICES)
+    status = models.CharField(max_length=10,
+                              choices=DataSubmission.STATUS_CHOICES
+                              )
+    day = models.DateField()
+    total = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["channel", "status", "day"],
+                                    name="submission_counter_key"
+                                    ),
+        ]
+
+    @staticmethod
+    def key(channel, status, submitted_at):
+        return channel, status, timezone.localdate(submitted_at)
+
+    @classmethod
+    def key_for(cls, submission):
+        return cls.key(
+            submission.channel, submission.status, submission.submitted_at
+        )
+
+    @classmethod
+    def apply(cls, deltas):
+        """Применение изменений {(канал, статус, день): дельта}.
+
+        Вместе со строками по дням обновляются итоги SubmissionTotal.
+        Вызывать внутри транзакции вместе с изменением самих заявок.
+        """
+        record_submissions(deltas)
+        totals = {}
+        for (channel, status, day), delta in deltas.items():
+            increment(cls, delta, channel=channel, status=status, day=day)
+            totals[channel, status] = totals.get((channel, status), 0) + delta
+        for (channel, status), delta in totals.items():
+            increment(SubmissionTotal, delta, channel=channel, status=status)
+
+
+class SubmissionTotal(models.Model):
+    """Количество заявок данных по каналу и статусу за всё время.
+
+    Итог строк SubmissionCounter: число строк не растёт с днями, поэтому
+    суммы по каналам читаются за постоянное время.
+    """
+
+    channel = models.IntegerField(choices=DataSubmission.CHANNEL_CHOICES)
+    status = models.CharField(max_length=10,
+                              choices=DataSubmission.STATUS_CHOICES
+                              )
+    total = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["channel", "status"],
+                                    name="submission_total_key"
+                                    ),
+        ]
+
+
+def increment(model, delta, **key):
+    """Прибавление delta к строке счётчика с ключом key (с созданием)."""
+    if not delta:
+        return
+    counters = model.objects.filter(**key)
+    if counters.update(total=F("total") + delta):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(total=delta, **key)
+    except IntegrityError:
+        # Строку счётчика параллельно создал другой процесс
+        counters.update(total=F("total") + delta)
 
 
 class Notification(models.Model):
@@ -147,3 +488,15 @@ class Notification(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"],
+                         name="notification_user_created_idx"
+                         ),
+            # Непрочитанные уведомления пользователя
+            models.Index(fields=["user", "-created_at"],
+                         name="notification_unread_idx",
+                         condition=models.Q(is_read=False)
+                         ),
+        ]
@@ -0,0 +1,108 @@
+import logging
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import record_fanout
+from .models import Notification, User
+
+logger = logging.getLogger(__name__)
+
+L1_AGENTS_CACHE_KEY = "notifications:l1_agent_ids"
+L1_AGENTS_CACHE_TIMEOUT = 300
+UNREAD_CACHE_KEY = "notifications:unread:{}"
+UNREAD_CACHE_TIMEOUT = 24 * 60 * 60
+BULK_BATCH_SIZE = 1000
+
+
+def get_l1_agent_ids():
+    """Идентификаторы агентов первой линии (кэшируются)."""
+    agent_ids = cache.get(L1_AGENTS_CACHE_KEY)
+    if agent_ids is None:
+        agent_ids = list(
+            User.objects.filter(role="support", support_level=1)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        cache.set(L1_AGENTS_CACHE_KEY, agent_ids, L1_AGENTS_CACHE_TIMEOUT)
+    return agent_ids
+
+
+def invalidate_l1_agents():
+    """Сброс кэша агентов первой линии."""
+    cache.delete(L1_AGENTS_CACHE_KEY)
+
+
+def unread_count(user_id):
+    """Количество непрочитанных уведомлений (кэш с запасным COUNT)."""
+    key = UNREAD_CACHE_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            user_id=user_id, is_read=False
+        ).count()
+        cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def add_unread(counts):
+    """Увеличение счётчиков {user_id: количество} после коммита.
+
+    Если счётчика нет в кэше, он будет посчитан заново при чтении.
+    """
+    def apply():
+        for user_id, count in counts.items():
+            try:
+                cache.incr(UNREAD_CACHE_KEY.format(user_id), count)
+            except ValueError:
+                pass
+
+    transaction.on_commit(apply)
+
+
+def reset_unread(user_id):
+    """Сброс счётчика после отметки уведомлений прочитанными."""
+    cache.delete(UNREAD_CACHE_KEY.format(user_id))
+
+
+def bulk_notify(notifications):
+    """Пакетная запись готовых уведомлений.
+
+    Возвращает количество созданных записей.
+    """
+    if not notifications:
+        return 0
+    Notification.objects.bulk_create(
+        notifications, batch_size=BULK_BATCH_SIZE
+    )
+    recipients = Counter(
+        notification.user_id for notification in notifications
+    )
+    add_unread(recipients)
+    record_fanout(len(recipients))
+    return len(notifications)
+
+
+def notify_users(user_ids, message):
+    """Рассылка одного сообщения списку пользователей.
+
+    Все уведомления пишутся одним пакетным INSERT.
+    Возвращает количество созданных записей.
+    """
+    return bulk_notify([
+        Notification(user_id=user_id, message=message)
+        for user_id in user_ids
+    ])
+
+
+def notify_l1_new_ticket(ticket):
+    """Уведомление агентов L1 о новой заявке."""
+    written = notify_users(
+        get_l1_agent_ids(),
+        f"Новая заявка от {ticket.user.username}: {ticket.subject}",
+    )
+    logger.info(
+        "Ticket #%s: %s L1 notifications written", ticket.id, written
+    )
+    return written
@@ -0,0 +1,113 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(direction, position):
+    """Непрозрачный курсор: направление и ключ граничной строки."""
+    timestamp, pk = position
+    payload = json.dumps(
+        {"d": direction, "t": timestamp.isoformat(), "i": pk},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Разбор курсора; None, если курсор отсутствует или повреждён."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        direction = payload["d"]
+        timestamp = parse_datetime(payload["t"])
+        pk = int(payload["i"])
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+    if direction not in ("next", "prev") or timestamp is None:
+        return None
+    return direction, (timestamp, pk)
+
+
+class KeysetPage:
+    """Страница выборки с курсорами на соседние страницы."""
+
+    def __init__(self, items, next_cursor, prev_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def older_than(queryset, field, position):
+    """Строки, идущие после position при сортировке по убыванию."""
+    timestamp, pk = position
+    return queryset.filter(
+        Q(**{f"{field}__lt": timestamp})
+        | Q(**{field: timestamp, "id__lt": pk})
+    )
+
+
+def newer_than(queryset, field, position):
+    """Строки, идущие перед position при сортировке по убыванию."""
+    timestamp, pk = position
+    return queryset.filter(
+        Q(**{f"{field}__gt": timestamp})
+        | Q(**{field: timestamp, "id__gt": pk})
+    )
+
+
+def keyset_paginate(queryset, cursor, page_size, field):
+    """Курсорная пагинация по убыванию (field, id).
+
+    Вместо OFFSET используется условие по ключу граничной строки, поэтому
+    стоимость страницы не зависит от её номера.
+    """
+    decoded = decode_cursor(cursor)
+    descending = queryset.order_by(f"-{field}", "-id")
+    if decoded is None:
+        direction = None
+        rows = list(descending[:page_size + 1])
+    else:
+        direction, position = decoded
+        if direction == "next":
+            rows = list(
+                older_than(descending, field, position)[:page_size + 1]
+            )
+        else:
+            rows = list(
+                newer_than(queryset, field, position)
+                .order_by(field, "id")[:page_size + 1]
+            )
+
+    if direction == "prev" and not rows:
+        # Более новых строк не осталось: показываем первую страницу
+        return keyset_paginate(queryset, None, page_size, field)
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == "prev":
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, direction == "next"
+
+    def key(row):
+        return getattr(row, field), row.pk
+
+    next_cursor = (
+        encode_cursor("next", key(rows[-1])) if rows and has_next else None
+    )
+    prev_cursor = (
+        encode_cursor("prev", key(rows[0])) if rows and has_prev else None
+    )
+    return KeysetPage(rows, next_cursor, prev_cursor)
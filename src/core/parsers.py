@@ -0,0 +1,39 @@
+import json
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class InvalidRecord:
+    """Строка NDJSON, которую не удалось разобрать."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class NDJSONParser(BaseParser):
+    """Разбор тела запроса в формате NDJSON (одна запись на строку).
+
+    Некорректные строки не прерывают разбор, а попадают в результат
+    как InvalidRecord, чтобы ошибка была привязана к своей записи.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        records = []
+        if stream is None:
+            return records
+        for line_no, raw_line in enumerate(stream, start=1):
+            line = raw_line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(
+                    InvalidRecord(f"Строка {line_no}: неверный формат JSON")
+                )
+        return records
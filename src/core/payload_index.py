@@ -0,0 +1,147 @@
+"""Индекс ключевых полей в данных заявок (DataSubmission.data).
+
+Поиск «все заявки по student_id» без индекса читает JSON каждой строки.
+PostgreSQL: GIN-индекс jsonb_path_ops по data, поиск через @>.
+SQLite: таблица core_submission_payload_key (ключ, значение, заявка),
+которую заполняют триггеры из json_each(data) — так индекс видит и
+bulk_create, и прямые UPDATE. Индексируются ключи из настройки
+SUBMISSION_PAYLOAD_KEYS; после её изменения триггеры и таблица
+пересобираются при следующем migrate (сигнал post_migrate).
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+DEFAULT_PAYLOAD_KEYS = ["student_id"]
+KEY_TABLE = "core_submission_payload_key"
+
+# GIN-индекс PostgreSQL и исходная таблица SQLite создаются миграцией
+# 0015_submission_payload_index
+SQLITE_TABLE_SQL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {KEY_TABLE} (
+        key text NOT NULL,
+        value text NOT NULL,
+        submission_id integer NOT NULL,
+        PRIMARY KEY (key, value, submission_id)
+    ) WITHOUT ROWID
+    """,
+    # Удаление строк заявки в триггерах
+    f"CREATE INDEX IF NOT EXISTS {KEY_TABLE}_submission_idx "
+    f"ON {KEY_TABLE} (submission_id)",
+]
+TRIGGER_NAMES = (
+    "core_submission_payload_insert",
+    "core_submission_payload_update",
+    "core_submission_payload_delete",
+)
+
+
+def payload_keys():
+    keys = getattr(settings, "SUBMISSION_PAYLOAD_KEYS", DEFAULT_PAYLOAD_KEYS)
+    for key in keys:
+        # Ключи подставляются в текст триггеров
+        if not re.fullmatch(r"\w+", key):
+            raise ValueError(f"Недопустимый ключ данных: {key!r}")
+    return list(keys)
+
+
+def extract_sql(submission_id, data, source=""):
+    """SELECT (ключ, значение, заявка) из скалярных индексируемых полей."""
+    keys = ", ".join(f"'{key}'" for key in payload_keys())
+    return (
+        f"SELECT payload.key, CAST(payload.value AS TEXT), {submission_id} "
+        f"FROM {source}json_each({data}) AS payload "
+        f"WHERE payload.key IN ({keys}) "
+        "AND payload.type IN ('integer', 'real', 'text')"
+    )
+
+
+def sqlite_triggers_sql():
+    insert = f"INSERT INTO {KEY_TABLE} (key, value, submission_id) "
+    return [
+        f"""
+        CREATE TRIGGER {TRIGGER_NAMES[0]}
+        AFTER INSERT ON core_datasubmission WHEN new.data IS NOT NULL BEGIN
+            {insert}{extract_sql("new.id", "new.data")};
+        END
+        """,
+        f"""
+        CREATE TRIGGER {TRIGGER_NAMES[1]}
+        AFTER UPDATE OF data ON core_datasubmission BEGIN
+            DELETE FROM {KEY_TABLE} WHERE submission_id = old.id;
+            {insert}{extract_sql("new.id", "new.data")};
+        END
+        """,
+        f"""
+        CREATE TRIGGER {TRIGGER_NAMES[2]}
+        AFTER DELETE ON core_datasubmission BEGIN
+            DELETE FROM {KEY_TABLE} WHERE submission_id = old.id;
+        END
+        """,
+    ]
+
+
+def install_payload_index(connection):
+    """Пересборка таблицы ключей и триггеров SQLite.
+
+    Повторный вызов безопасен.
+    """
+    with connection.cursor() as cursor:
+        for sql in SQLITE_TABLE_SQL:
+            cursor.execute(sql)
+        for name in TRIGGER_NAMES:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for sql in sqlite_triggers_sql():
+            cursor.execute(sql)
+        cursor.execute(f"DELETE FROM {KEY_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {KEY_TABLE} (key, value, submission_id) "
+            + extract_sql(
+                "submission.id", "submission.data",
+                "core_datasubmission AS submission, ",
+            )
+        )
+
+
+def refresh_payload_index(connection):
+    """Пересборка после migrate, если триггеры пропали или устарели.
+
+    Триггеры исчезают, когда миграция пересоздаёт core_datasubmission, и
+    устаревают при смене SUBMISSION_PAYLOAD_KEYS.
+    """
+    if connection.vendor != "sqlite":
+        return
+    if KEY_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+            f"AND name = '{TRIGGER_NAMES[0]}'"
+        )
+        row = cursor.fetchone()
+    expected = sqlite_triggers_sql()[0].strip()
+    if row is None or row[0].strip() != expected:
+        install_payload_index(connection)
+
+
+def filter_by_payload(queryset, key, value):
+    """Заявки, у которых в data поле key равно value (по индексу).
+
+    Значение сравнивается как строка: 42 и "42" совпадают.
+    """
+    if key not in payload_keys():
+        raise ValueError(f"Поле {key!r} не индексируется")
+    value = str(value).strip()
+    if connections[queryset.db].vendor == "postgresql":
+        condition = Q(data__contains={key: value})
+        if re.fullmatch(r"-?\d+", value):
+            condition |= Q(data__contains={key: int(value)})
+        return queryset.filter(condition)
+    return queryset.filter(id__in=RawSQL(
+        f"SELECT submission_id FROM {KEY_TABLE} WHERE key = %s AND value = %s",
+        [key, value],
+    ))
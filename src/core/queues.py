@@ -0,0 +1,79 @@
+"""Версии очередей заявок для кэша фрагментов tickets/list.html.
+
+Все агенты одного уровня видят одну и ту же очередь, поэтому таблица
+очереди кэшируется по уровню и номеру версии. Изменение заявки
+увеличивает версии только тех уровней, в очередях которых заявка была
+или оказалась, и старый фрагмент просто перестаёт запрашиваться.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Ticket
+
+QUEUE_VERSION_KEY = "tickets:queue_version:{}"
+QUEUE_FRAGMENT_TIMEOUT = 60 * 60
+SUPPORT_LEVELS = (1, 2, 3)
+
+
+def visible_tickets(user):
+    """Очередь заявок агента по его уровню поддержки."""
+    if user.support_level == 1:
+        return Ticket.objects.filter(
+            support_line=1, status__in=["open", "in_progress"]
+        ).order_by("-created_at")
+    if user.support_level == 2:
+        return Ticket.objects.filter(
+            support_line=2, status="escalated").order_by("-created_at")
+    if user.support_level == 3:
+        return Ticket.objects.filter(
+            Q(support_line=3) | Q(l3_watch=True)
+        )
+    return Ticket.objects.none()
+
+
+def ticket_access_error(user, ticket):
+    """Текст отказа в просмотре заявки агентом или None."""
+    if user.support_level == 1 and ticket.support_line != 1:
+        return "Вы можете просматривать только заявки L1."
+    if (
+        user.support_level in [2, 3]
+        and ticket.support_line != user.support_level
+    ):
+        return "Вы можете просматривать только заявки вашего уровня."
+    return None
+
+
+def queue_levels(support_line, status, l3_watch):
+    """Уровни, в очередь которых попадает заявка с такими полями.
+
+    Условия совпадают с выборками visible_tickets.
+    """
+    levels = set()
+    if support_line == 1 and status in ("open", "in_progress"):
+        levels.add(1)
+    if support_line == 2 and status == "escalated":
+        levels.add(2)
+    if support_line == 3 or l3_watch:
+        levels.add(3)
+    return levels
+
+
+def queue_version(level):
+    version = cache.get(QUEUE_VERSION_KEY.format(level))
+    if version is None:
+        # Начальная версия от времени: после вытеснения ключа из кэша
+        # не совпадёт с версией уже закэшированных фрагментов
+        cache.add(QUEUE_VERSION_KEY.format(level), time.time_ns(), None)
+        version = cache.get(QUEUE_VERSION_KEY.format(level))
+    return version
+
+
+def bump_queue_versions(levels):
+    for level in levels:
+        try:
+            cache.incr(QUEUE_VERSION_KEY.format(level))
+        except ValueError:
+            # Версии ещё нет: она появится при следующем чтении
+            pass
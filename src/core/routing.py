@@ -0,0 +1,87 @@
+"""Маршрутизация новых заявок.
+
+Правила RoutingRule сопоставляют категорию и источник заявки с линией
+поддержки, начальным статусом и признаком l3_watch. Правила один раз
+компилируются в словарь и кэшируются в процессе; версия правил хранится
+в кэше Django и сбрасывается сигналами при изменении правила. Маршрут
+вычисляется до INSERT, поэтому заявка создаётся одной записью.
+"""
+import uuid
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from .models import RoutingRule, Ticket
+
+ROUTING_VERSION_CACHE_KEY = "tickets:routing_version"
+ROUTING_VERSION_CACHE_TIMEOUT = 300
+
+Route = namedtuple("Route", ["support_line", "status", "l3_watch"])
+# Маршрут без подходящих правил: как у заявки по умолчанию
+DEFAULT_ROUTE = Route(1, "new", False)
+
+_compiled = {"version": None, "routes": {}}
+
+
+def compile_rules(rules):
+    """{(категория, источник): маршрут}; пустая строка — любое значение."""
+    return {
+        (rule.category, rule.source): Route(
+            rule.support_line, rule.status, rule.l3_watch
+        )
+        for rule in rules
+    }
+
+
+def routing_version():
+    """Текущая версия правил; новая версия появляется после сброса."""
+    version = cache.get(ROUTING_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(
+            ROUTING_VERSION_CACHE_KEY, uuid.uuid4().hex,
+            ROUTING_VERSION_CACHE_TIMEOUT,
+        )
+        version = cache.get(ROUTING_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_routes():
+    cache.delete(ROUTING_VERSION_CACHE_KEY)
+    _compiled["version"] = None
+
+
+def get_routes():
+    version = routing_version()
+    if version is None or version != _compiled["version"]:
+        _compiled["routes"] = compile_rules(
+            RoutingRule.objects.filter(is_active=True)
+        )
+        _compiled["version"] = version
+    return _compiled["routes"]
+
+
+def route_ticket(category, source):
+    """Маршрут заявки: от точного правила к правилам «по умолчанию»."""
+    routes = get_routes()
+    for key in (
+        (category, source), (category, ""), ("", source), ("", ""),
+    ):
+        if key in routes:
+            return routes[key]
+    return DEFAULT_ROUTE
+
+
+def create_ticket(user, subject, description, category="other",
+                  source="form"):
+    """Создание заявки сразу на линии и в статусе по правилам."""
+    route = route_ticket(category, source)
+    return Ticket.objects.create(
+        subject=subject,
+        description=description,
+        user=user,
+        category=category,
+        source=source,
+        support_line=route.support_line,
+        status=route.status,
+        l3_watch=route.l3_watch,
+    )
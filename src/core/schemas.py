@@ -0,0 +1,230 @@
+"""Схемы валидации данных заявок.
+
+Схема канала хранится в ValidationSchema и описывает поля записи:
+
+    {"student_id": {"required": true, "type": "integer", "min": 1},
+     "name": {"required": true, "type": "string", "max_length": 200}}
+
+Каждая схема один раз компилируется в список проверок и кэшируется в
+процессе. Версия схем хранится в кэше Django и сбрасывается сигналами
+при изменении или удалении схемы, после чего схемы компилируются заново.
+"""
+import re
+import uuid
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from .models import ValidationSchema
+
+SCHEMA_VERSION_CACHE_KEY = "validation:schema_version"
+SCHEMA_VERSION_CACHE_TIMEOUT = 300
+
+REQUIRED = "Обязательное поле"
+
+RULE_KEYS = {
+    "required", "type", "min", "max", "min_length", "max_length",
+    "choices", "pattern",
+}
+
+
+def as_string(value):
+    if isinstance(value, str):
+        return value
+    raise ValueError("Ожидается строка")
+
+
+def as_integer(value):
+    # Значения из CSV приходят строками
+    if isinstance(value, bool) or isinstance(value, float):
+        raise ValueError("Ожидается целое число")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Ожидается целое число")
+
+
+def as_number(value):
+    if isinstance(value, bool):
+        raise ValueError("Ожидается число")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError("Ожидается число")
+
+
+def as_boolean(value):
+    if isinstance(value, bool):
+        return value
+    raise ValueError("Ожидается логическое значение")
+
+
+TYPES = {
+    "string": as_string,
+    "integer": as_integer,
+    "number": as_number,
+    "boolean": as_boolean,
+}
+
+
+def compile_field(name, rule):
+    """Правило поля: (обязательность, список проверок значения).
+
+    Проверка возвращает значение или бросает ValueError с текстом ошибки.
+    """
+    if not isinstance(rule, dict):
+        raise ValidationError(f"{name}: правило должно быть объектом")
+    unknown = set(rule) - RULE_KEYS
+    if unknown:
+        raise ValidationError(
+            f"{name}: неизвестные правила {', '.join(sorted(unknown))}"
+        )
+    type_name = rule.get("type")
+    if type_name is not None and type_name not in TYPES:
+        raise ValidationError(f"{name}: неизвестный тип {type_name!r}")
+
+    for key in ("min", "max", "min_length", "max_length"):
+        limit = rule.get(key)
+        if limit is not None and (
+            isinstance(limit, bool) or not isinstance(limit, (int, float))
+        ):
+            raise ValidationError(f"{name}: {key} должно быть числом")
+
+    checks = []
+    ranged = rule.get("min") is not None or rule.get("max") is not None
+    if type_name is not None and not (
+        ranged and type_name in ("integer", "number")
+    ):
+        # Проверка диапазона сама приводит значение к числу
+        checks.append(TYPES[type_name])
+    if ranged:
+        low, high = rule.get("min"), rule.get("max")
+        convert = as_integer if type_name == "integer" else as_number
+
+        def check_range(value):
+            number = convert(value)
+            if low is not None and number < low:
+                raise ValueError(f"Значение меньше {low}")
+            if high is not None and number > high:
+                raise ValueError(f"Значение больше {high}")
+            return value
+
+        checks.append(check_range)
+    if rule.get("min_length") is not None or rule.get("max_length") is not None:
+        shortest, longest = rule.get("min_length"), rule.get("max_length")
+
+        def check_length(value):
+            length = len(str(value))
+            if shortest is not None and length < shortest:
+                raise ValueError(f"Длина меньше {shortest}")
+            if longest is not None and length > longest:
+                raise ValueError(f"Длина больше {longest}")
+            return value
+
+        checks.append(check_length)
+    if rule.get("choices") is not None:
+        choices = frozenset(str(choice) for choice in rule["choices"])
+
+        def check_choices(value):
+            if str(value) not in choices:
+                raise ValueError("Недопустимое значение")
+            return value
+
+        checks.append(check_choices)
+    if rule.get("pattern") is not None:
+        try:
+            pattern = re.compile(rule["pattern"])
+        except re.error:
+            raise ValidationError(f"{name}: неверное регулярное выражение")
+
+        def check_pattern(value):
+            if not pattern.fullmatch(str(value)):
+                raise ValueError("Значение не соответствует шаблону")
+            return value
+
+        checks.append(check_pattern)
+    return bool(rule.get("required")), checks
+
+
+def compile_schema(fields):
+    """Компиляция описания полей в функцию проверки записи.
+
+    Возвращаемая функция принимает словарь записи и возвращает словарь
+    ошибок {поле: сообщение}; пустой словарь — запись корректна.
+    """
+    if not isinstance(fields, dict):
+        raise ValidationError("Описание полей должно быть объектом")
+    compiled = [
+        (name, *compile_field(name, rule)) for name, rule in fields.items()
+    ]
+
+    def validate(record):
+        errors = {}
+        for name, required, checks in compiled:
+            value = record.get(name)
+            if value is None or value == "":
+                if required:
+                    errors[name] = REQUIRED
+                continue
+            try:
+                for check in checks:
+                    check(value)
+            except ValueError as exc:
+                errors[name] = str(exc)
+        return errors
+
+    return validate
+
+
+def no_rules(record):
+    return {}
+
+
+_compiled = {"version": None, "validators": {}}
+
+
+def schema_version():
+    """Текущая версия схем; новая версия появляется после сброса."""
+    version = cache.get(SCHEMA_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(
+            SCHEMA_VERSION_CACHE_KEY, uuid.uuid4().hex,
+            SCHEMA_VERSION_CACHE_TIMEOUT,
+        )
+        version = cache.get(SCHEMA_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_schemas():
+    cache.delete(SCHEMA_VERSION_CACHE_KEY)
+    _compiled["version"] = None
+
+
+def get_validators():
+    """Скомпилированные проверки {канал: функция} активных схем."""
+    version = schema_version()
+    if version is None or version != _compiled["version"]:
+        _compiled["validators"] = {
+            schema.channel: compile_schema(schema.fields)
+            for schema in ValidationSchema.objects.filter(is_active=True)
+        }
+        _compiled["version"] = version
+    return _compiled["validators"]
+
+
+def validate_records(channel, records):
+    """Пакетная проверка записей одного канала.
+
+    Возвращает список словарей ошибок в порядке записей.
+    """
+    validate = get_validators().get(channel, no_rules)
+    return [validate(record) for record in records]
+
+
+def missing_fields(channel, record):
+    """Обязательные поля схемы канала, которых нет в записи.
+
+    Остальные правила проверяет validate_submissions.
+    """
+    errors = validate_records(channel, [record])[0]
+    return [name for name, message in errors.items() if message == REQUIRED]
@@ -0,0 +1,161 @@
+"""Полнотекстовый поиск по теме и описанию заявок.
+
+PostgreSQL: хранимая колонка core_ticket.search_vector (GENERATED ...
+STORED, конфигурация russian) с GIN-индексом. SQLite: таблица FTS5
+core_ticket_fts с внешним содержимым, которую обновляют триггеры.
+И колонка, и триггеры поддерживаются самой СУБД, поэтому индекс
+актуален после save(), QuerySet.update() и прямых UPDATE.
+
+Встроенные токенайзеры FTS5 не знают русской морфологии: на SQLite
+слова запроса обрезаются до основы и ищутся по префиксу.
+"""
+import re
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Ticket
+from .queues import visible_tickets
+
+# Индекс создаёт миграция 0014_ticket_search. Триггеры FTS5 (SQLite)
+# совпадают с миграцией: они восстанавливаются после каждого migrate
+SQLITE_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS core_ticket_fts_insert
+    AFTER INSERT ON core_ticket BEGIN
+        INSERT INTO core_ticket_fts(rowid, subject, description)
+        VALUES (new.id, new.subject, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_ticket_fts_delete
+    AFTER DELETE ON core_ticket BEGIN
+        INSERT INTO core_ticket_fts(core_ticket_fts, rowid, subject,
+                                    description)
+        VALUES ('delete', old.id, old.subject, old.description);
+    END
+    """,
+    # Смена статуса или линии индекс не трогает
+    """
+    CREATE TRIGGER IF NOT EXISTS core_ticket_fts_update
+    AFTER UPDATE OF subject, description ON core_ticket BEGIN
+        INSERT INTO core_ticket_fts(core_ticket_fts, rowid, subject,
+                                    description)
+        VALUES ('delete', old.id, old.subject, old.description);
+        INSERT INTO core_ticket_fts(rowid, subject, description)
+        VALUES (new.id, new.subject, new.description);
+    END
+    """,
+]
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SEARCH_MAX_TERMS = 8
+MIN_STEM_LENGTH = 3
+
+# Окончания для обрезки до основы, от длинных к коротким
+RUSSIAN_ENDINGS = sorted((
+    "иями", "ями", "ами", "иях", "ией", "ого", "его", "ому", "ему", "ыми",
+    "ими", "ение", "ения", "ений", "ость", "ости", "ать", "ять", "ить",
+    "ешь", "ишь", "ует", "юет", "ая", "яя", "ое", "ее", "ые", "ие", "ый",
+    "ий", "ой", "ей", "ом", "ем", "ам", "ям", "ах", "ях", "ов", "ев", "ую",
+    "юю", "ит", "ет", "ут", "ют", "ат", "ят", "ла", "ло", "ли", "ть", "а",
+    "я", "о", "е", "ы", "и", "у", "ю", "ь",
+), key=len, reverse=True)
+
+
+def restore_search_triggers(connection):
+    """Триггеры FTS5 после migrate, если таблица индекса уже создана.
+
+    Миграции, пересоздающие core_ticket на SQLite, удаляют триггеры
+    вместе со старой таблицей.
+    """
+    if connection.vendor != "sqlite":
+        return
+    if "core_ticket_fts" not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for sql in SQLITE_TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def query_words(query):
+    words = re.findall(r"\w+", query.lower().replace("ё", "е"))
+    return words[:SEARCH_MAX_TERMS]
+
+
+def stem(word):
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def fts5_query(query):
+    """Запрос FTS5: все основы слов по префиксу, синтаксис FTS экранирован."""
+    return " ".join(f'"{stem(word)}"*' for word in query_words(query))
+
+
+def ranked_ids_postgresql(tickets, query, start, limit):
+    tsquery = "websearch_to_tsquery('russian', %s)"
+    return list(
+        tickets.filter(RawSQL(
+            f'"core_ticket"."search_vector" @@ {tsquery}', [query],
+            output_field=BooleanField(),
+        ))
+        .annotate(rank=RawSQL(
+            f'ts_rank("core_ticket"."search_vector", {tsquery})', [query],
+            output_field=FloatField(),
+        ))
+        .order_by("-rank", "-id")
+        .values_list("id", flat=True)[start:start + limit]
+    )
+
+
+def ranked_ids_sqlite(tickets, query, start, limit):
+    """Соединение FTS5 с core_ticket и условиями очереди агента.
+
+    bm25 считается только в контексте MATCH, поэтому запрос пишется
+    вручную: условия видимости берутся из WHERE выборки очереди.
+    """
+    try:
+        where, params = tickets.query.get_compiler(
+            connection=connection
+        ).compile(tickets.query.where)
+    except EmptyResultSet:
+        return []
+    with connection.cursor() as cursor:
+        # bm25: чем меньше, тем релевантнее; тема весит больше описания
+        cursor.execute(
+            "SELECT core_ticket_fts.rowid FROM core_ticket_fts "
+            'JOIN core_ticket ON "core_ticket"."id" = core_ticket_fts.rowid '
+            f"WHERE core_ticket_fts MATCH %s AND {where} "
+            "ORDER BY bm25(core_ticket_fts, 2.0, 1.0), "
+            "core_ticket_fts.rowid DESC LIMIT %s OFFSET %s",
+            [fts5_query(query), *params, limit, start],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_tickets(user, query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """Страница найденных заявок из очереди агента по релевантности.
+
+    Возвращает (заявки, есть_ли_следующая_страница); общее число
+    совпадений не считается, чтобы не обходить их все.
+    """
+    if not query_words(query):
+        return [], False
+    if connection.vendor == "postgresql":
+        ranked_ids = ranked_ids_postgresql
+    else:
+        ranked_ids = ranked_ids_sqlite
+    ids = ranked_ids(
+        visible_tickets(user), query, (page - 1) * page_size, page_size + 1
+    )
+    tickets = Ticket.objects.select_related("user").in_bulk(ids[:page_size])
+    return (
+        [tickets[ticket_id] for ticket_id in ids[:page_size]],
+        len(ids) > page_size,
+    )
@@ -0,0 +1,38 @@
+from rest_framework import serializers
+
+from .models import Ticket
+
+
+class TicketSerializer(serializers.ModelSerializer):
+    """Заявка для JSON API.
+
+    Параметр запроса fields (через запятую) оставляет в ответе только
+    перечисленные поля.
+    """
+
+    author = serializers.CharField(source="user.username", read_only=True)
+    status_display = serializers.CharField(
+        source="get_status_display", read_only=True
+    )
+
+    class Meta:
+        model = Ticket
+        fields = [
+            "id", "subject", "description", "status", "status_display",
+            "support_line", "category", "author", "created_at", "update_at",
+        ]
+        read_only_fields = fields
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def requested_fields(request):
+    """Поля из параметра fields или None (все поля)."""
+    value = request.query_params.get("fields")
+    if not value:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
@@ -0,0 +1,140 @@
+from django.db import connections, transaction
+from django.db.models.signals import (
+    post_delete, post_init, post_migrate, post_save
+)
+from django.dispatch import receiver
+
+from .backends import invalidate_user
+from .counters import submission_deleted
+from .events import publish_ticket_event
+from .metrics import record_ticket_created
+from .models import (
+    DataSubmission, Notification, RoutingRule, Ticket, User, ValidationSchema
+)
+from .notifications import add_unread, invalidate_l1_agents
+from .queues import bump_queue_versions, queue_levels
+from .payload_index import refresh_payload_index
+from .routing import invalidate_routes
+from .search import restore_search_triggers
+from .schemas import invalidate_schemas
+
+SUPPORT_FIELDS = {"role", "support_level"}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Сброс кэшированного объекта пользователя."""
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    """Сброс кэша агентов при изменении роли или уровня после коммита."""
+    if update_fields is not None and not SUPPORT_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(invalidate_l1_agents)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    """Сброс кэша агентов при удалении пользователя."""
+    transaction.on_commit(invalidate_l1_agents)
+
+
+@receiver(post_save, sender=ValidationSchema)
+@receiver(post_delete, sender=ValidationSchema)
+def schema_changed(sender, instance, **kwargs):
+    """Перекомпиляция схем валидации после изменения."""
+    transaction.on_commit(invalidate_schemas)
+
+
+@receiver(post_save, sender=RoutingRule)
+@receiver(post_delete, sender=RoutingRule)
+def routing_rule_changed(sender, instance, **kwargs):
+    """Перекомпиляция правил маршрутизации после изменения."""
+    transaction.on_commit(invalidate_routes)
+
+
+@receiver(post_init, sender=DataSubmission)
+def data_submission_loaded(sender, instance, **kwargs):
+    """Запоминание ключа счётчика заявки в том виде, как она загружена."""
+    instance.remember_counter_fields()
+
+
+@receiver(post_delete, sender=DataSubmission)
+def data_submission_deleted(sender, instance, **kwargs):
+    """Уменьшение счётчиков заявок, в том числе при каскадном удалении."""
+    submission_deleted(instance)
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    """Учёт нового уведомления в счётчике непрочитанных."""
+    if created and not instance.is_read:
+        add_unread({instance.user_id: 1})
+
+
+TICKET_STATUS_EVENTS = {
+    "escalated": "escalated",
+    "resolved": "resolved",
+}
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    """Отправка события заявки агентам после коммита.
+
+    Событие смены статуса отправляется, только если статус изменился
+    с момента загрузки заявки.
+    """
+    previous_status = instance._loaded_status
+    status = instance._loaded_status = instance.__dict__.get("status")
+    if created:
+        event_type = "created"
+        transaction.on_commit(lambda: record_ticket_created(instance))
+    elif status == previous_status:
+        return
+    else:
+        event_type = TICKET_STATUS_EVENTS.get(status)
+    if event_type is None:
+        return
+    transaction.on_commit(
+        lambda: publish_ticket_event(event_type, instance)
+    )
+
+
+def ticket_queue_levels(ticket):
+    # Отложенные поля (.only()) не читаем, чтобы не вызвать запрос
+    fields = ticket.__dict__
+    return queue_levels(
+        fields.get("support_line"), fields.get("status"),
+        fields.get("l3_watch"),
+    )
+
+
+@receiver(post_init, sender=Ticket)
+def ticket_loaded(sender, instance, **kwargs):
+    """Запоминание статуса и очередей заявки до изменения."""
+    instance._loaded_status = instance.__dict__.get("status")
+    instance._queue_levels = ticket_queue_levels(instance)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_queue_changed(sender, instance, **kwargs):
+    """Новые версии очередей, где заявка была или появилась."""
+    levels = instance._queue_levels
+    if kwargs.get("signal") is post_save:
+        levels = levels | ticket_queue_levels(instance)
+        instance._queue_levels = ticket_queue_levels(instance)
+    if levels:
+        transaction.on_commit(lambda: bump_queue_versions(levels))
+
+
+@receiver(post_migrate)
+def database_triggers_restored(sender, using, **kwargs):
+    """Восстановление триггеров индексов, удалённых пересозданием таблиц."""
+    if sender.name == "core":
+        restore_search_triggers(connections[using])
+        refresh_payload_index(connections[using])
@@ -1 +1,1674 @@
-# Create your tests here.
+import json
+import logging
+import re
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+try:
+    import psycopg_pool
+except ImportError:
+    psycopg_pool = None
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from .archive import archive_batch, archived_submissions, retention_cutoff
+from .benchmarks import (
+    SCENARIOS,
+    SKIPPED_ROUTES,
+    compare_reports,
+    run_benchmarks,
+    seed_dataset,
+)
+from .counters import (
+    batched_counter_updates,
+    channel_totals,
+    reconcile_counters,
+)
+from .decorators import query_budget
+from .dedup import find_fingerprints
+from .events import (
+    InProcessBroker,
+    publish_ticket_event,
+    ticket_audience,
+    ticket_event,
+)
+from .ingestion import BULK_BATCH_SIZE, ingest_offline_file
+from .middleware import QueryBudgetExceeded, QueryCountMiddleware, fingerprint
+from .models import (
+    ArchivedSubmission,
+    DataSubmission,
+    Notification,
+    RoutingRule,
+    SubmissionCounter,
+    SubmissionFingerprint,
+    SubmissionTotal,
+    Ticket,
+    User,
+    ValidationSchema,
+)
+from .notifications import get_l1_agent_ids, notify_users, unread_count
+from .payload_index import filter_by_payload, refresh_payload_index
+from .queues import queue_version
+from .routing import invalidate_routes, route_ticket
+from .schemas import compile_schema, invalidate_schemas, validate_records
+from .validation import validate_pending_batch
+
+
+class L1NotificationTests(TestCase):
+    """Рассылка уведомлений агентам первой линии о новых заявках."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.provider = User.objects.create_user(
+            username="prov", password="123", role="provider"
+        )
+        cls.agents = [
+            User.objects.create_user(
+                username=f"l1_{n}", password="123", role="support",
+                support_level=1,
+            )
+            for n in range(3)
+        ]
+        User.objects.create_user(
+            username="l2", password="123", role="support", support_level=2
+        )
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+
+    def test_one_notification_per_agent(self):
+        self.client.force_login(self.provider)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse("ticket_create"), {
+                "subject": "Не работает", "description": "Текст",
+            })
+        notified = Notification.objects.filter(
+            message__contains="Не работает"
+        )
+        self.assertEqual(
+            sorted(notified.values_list("user_id", flat=True)),
+            [agent.pk for agent in self.agents],
+        )
+        inserts = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "core_notification"')
+        ]
+        self.assertEqual(len(inserts), 1)
+
+    def test_agent_cache_invalidated(self):
+        self.assertEqual(
+            get_l1_agent_ids(), [agent.pk for agent in self.agents]
+        )
+        agent = self.agents[0]
+        agent.support_level = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            agent.save()
+            # До коммита другие запросы видят прежний состав
+            self.assertEqual(
+                get_l1_agent_ids(), [agent.pk for agent in self.agents]
+            )
+        self.assertEqual(
+            get_l1_agent_ids(), [agent.pk for agent in self.agents[1:]]
+        )
+        # Изменение других полей кэш не сбрасывает
+        with self.captureOnCommitCallbacks() as callbacks:
+            agent.save(update_fields=["email"])
+        self.assertEqual(callbacks, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agents[1].delete()
+        self.assertEqual(get_l1_agent_ids(), [self.agents[2].pk])
+
+
+class ApiBatchIngestionTests(TestCase):
+    """Пакетный приём записей канала API."""
+
+    def post(self, body, content_type="application/json"):
+        return self.client.post(
+            reverse("api_data_batch_submission"), body,
+            content_type=content_type,
+        )
+
+    def test_errors_per_record(self):
+        response = self.post([
+            {"provider_name": "p", "data": {"name": "Иван"}},
+            {"provider_name": "p"},
+            "строка",
+            {"provider_name": "p", "data": {"name": "Пётр"}},
+        ])
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (2, 2))
+        results = body["results"]
+        self.assertEqual([result["index"] for result in results], [0, 1, 2, 3])
+        self.assertEqual(
+            results[1]["error"], "Требуется поле 'data' в виде объекта"
+        )
+        self.assertEqual(results[2]["error"], "Запись должна быть объектом")
+        self.assertEqual(
+            DataSubmission.objects.get(pk=results[3]["submission_id"]).status,
+            "pending",
+        )
+
+    def test_ndjson(self):
+        lines = [
+            json.dumps({"provider_name": "p", "data": {"name": "Иван"}}),
+            "{не json",
+            "",
+            json.dumps({"provider_name": "p", "data": {"name": "Пётр"}}),
+        ]
+        response = self.post("\n".join(lines), "application/x-ndjson")
+        self.assertEqual(response.status_code, 201)
+        results = response.json()["results"]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(
+            results[1], {"index": 1, "error": "Строка 2: неверный формат JSON"}
+        )
+        self.assertEqual(DataSubmission.objects.count(), 2)
+
+    def count_queries(self, size):
+        records = [
+            {"provider_name": "p", "data": {"name": f"{size}-{n}"}}
+            for n in range(size)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.post(records).status_code, 201)
+        inserts = Counter()
+        other = 0
+        for query in queries:
+            match = re.match(r'INSERT INTO "(\w+)"', query["sql"])
+            if match:
+                inserts[match[1]] += 1
+            else:
+                other += 1
+        return inserts, other
+
+    def chunks(self, model, size, batch_size=None):
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        limit = connection.ops.bulk_batch_size(fields, [None] * size)
+        if batch_size:
+            limit = min(limit, batch_size)
+        return -(-size // limit)
+
+    def test_queries_per_chunk(self):
+        # Первый пакет создаёт строку счётчика
+        self.count_queries(2)
+        _, constant = self.count_queries(1)
+        size = 2 * BULK_BATCH_SIZE + 1
+        inserts, other = self.count_queries(size)
+        self.assertEqual(other, constant)
+        self.assertEqual(inserts, {
+            "core_datasubmission": self.chunks(
+                DataSubmission, size, BULK_BATCH_SIZE
+            ),
+            "core_submissionfingerprint": self.chunks(
+                SubmissionFingerprint, size
+            ),
+        })
+
+    def test_rejected_batches(self):
+        self.assertEqual(self.post({"provider_name": "p"}).status_code, 400)
+        response = self.post([{"provider_name": "p"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["failed"], 1)
+        with mock.patch("core.views.API_BATCH_MAX_RECORDS", 1):
+            response = self.post([{}, {}])
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(DataSubmission.objects.exists())
+
+
+class OfflineUploadTests(TestCase):
+    """Построчный разбор CSV и NDJSON-файлов офлайн-загрузки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="resp", password="123", role="respondent"
+        )
+
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def ingest(self, name, content):
+        return ingest_offline_file(
+            self.user, SimpleUploadedFile(name, content.encode())
+        )
+
+    def rows(self, upload):
+        return [
+            (row.row_number, row.status, row.data, row.validation_errors)
+            for row in upload.records.order_by("row_number")
+        ]
+
+    @mock.patch("core.ingestion.OFFLINE_ROW_BATCH_SIZE", 2)
+    def test_csv_rows(self):
+        with mock.patch.object(
+            SubmissionCounter, "apply", wraps=SubmissionCounter.apply
+        ) as apply:
+            upload, total, invalid = self.ingest(
+                "rows.csv", "student_id,name\n1,Иван\n2\n3,Пётр\n4,Анна\n"
+            )
+        self.assertEqual((total, invalid), (4, 1))
+        # Счётчики обновляются один раз на файл, а не на пакет строк
+        apply.assert_called_once()
+        self.assertEqual(channel_totals(), {3: 4})
+        self.assertEqual(self.rows(upload), [
+            (2, "pending", {"student_id": "1", "name": "Иван"}, {}),
+            (3, "rejected", None, {"content": "Неверное число столбцов"}),
+            (4, "pending", {"student_id": "3", "name": "Пётр"}, {}),
+            (5, "pending", {"student_id": "4", "name": "Анна"}, {}),
+        ])
+
+    def test_ndjson_rows(self):
+        upload, total, invalid = self.ingest(
+            "rows.ndjson", '{"student_id": 1}\n\n{oops\n{"student_id": 2}\n'
+        )
+        self.assertEqual((total, invalid), (3, 1))
+        self.assertEqual(self.rows(upload), [
+            (1, "pending", {"student_id": 1}, {}),
+            (3, "rejected", None, {"content": "Неверный формат JSON"}),
+            (4, "pending", {"student_id": 2}, {}),
+        ])
+
+    def test_empty_file(self):
+        upload, total, invalid = self.ingest("rows.csv", "student_id,name\n")
+        self.assertEqual((total, invalid), (0, 0))
+        self.assertEqual(upload.status, "rejected")
+
+
+class SubmissionValidationTests(TestCase):
+    """Приём заявок без проверки и фоновая валидация."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.respondent = User.objects.create_user(
+            username="resp", password="123", role="respondent"
+        )
+        cls.agent = User.objects.create_user(
+            username="l1", password="123", role="support", support_level=1
+        )
+
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.client.force_login(self.respondent)
+
+    def upload(self, name, content):
+        return self.client.post(
+            reverse("upload_offline"),
+            {"data_file": SimpleUploadedFile(name, content.encode())},
+        )
+
+    def test_missing_field_opens_ticket(self):
+        response = self.client.post(
+            reverse("submit_data"),
+            {"data_json": json.dumps({"name": "Иван"})},
+        )
+        self.assertRedirects(response, reverse("notifications"))
+        self.assertFalse(DataSubmission.objects.exists())
+        ticket = Ticket.objects.get(user=self.respondent)
+        self.assertIn("'student_id'", ticket.description)
+        self.assertTrue(
+            Notification.objects.filter(
+                user=self.agent, message__contains=ticket.subject
+            ).exists()
+        )
+
+    def test_json_upload_missing_field(self):
+        self.upload("data.json", json.dumps({"name": "Иван"}))
+        submission = DataSubmission.objects.get()
+        self.assertEqual(submission.status, "rejected")
+        self.assertEqual(
+            submission.validation_errors, {"student_id": "Обязательное поле"}
+        )
+        self.assertTrue(Ticket.objects.filter(source="upload").exists())
+        self.assertEqual(channel_totals(), {3: 1})
+
+    def test_worker_claims_pending(self):
+        DataSubmission.objects.bulk_create([
+            DataSubmission(user=self.respondent, channel=2, status="pending",
+                           data={"student_id": n, "name": "Иван"})
+            for n in range(3)
+        ] + [
+            DataSubmission(user=self.respondent, channel=2, status="pending",
+                           data={"name": "Пётр"}),
+            DataSubmission(user=self.respondent, channel=1, status="pending",
+                           data={"student_id": 1}),
+        ])
+        reconcile_counters()
+        self.assertEqual(validate_pending_batch(batch_size=2), 2)
+        self.assertEqual(
+            DataSubmission.objects.filter(status="pending").count(), 3
+        )
+        call_command(
+            "validate_submissions", once=True, batch_size=2, stdout=StringIO()
+        )
+        statuses = dict(
+            DataSubmission.objects.values("status").annotate(total=Count("id"))
+            .values_list("status", "total")
+        )
+        self.assertEqual(statuses, {"accepted": 3, "rejected": 2})
+        self.assertFalse(
+            DataSubmission.objects.filter(validated_at=None).exists()
+        )
+        rejected = DataSubmission.objects.get(channel=1)
+        self.assertEqual(
+            rejected.validation_errors, {"name": "Обязательное поле"}
+        )
+        # Одно уведомление об отклонённых записях на пакет
+        self.assertEqual(
+            Notification.objects.filter(
+                user=self.respondent, message__startswith="Отклонено"
+            ).count(),
+            2,
+        )
+        self.assertEqual(reconcile_counters(), 0)
+
+    def test_streamed_upload_final_state(self):
+        self.upload("rows.csv", "student_id,name\n1,Иван\n2,Пётр\n")
+        upload = DataSubmission.objects.get(source_file=None)
+        self.assertEqual(upload.status, "accepted")
+        self.assertEqual(upload.records.filter(status="pending").count(), 2)
+        # Файл загрузки не считается отдельной заявкой
+        self.assertEqual(channel_totals(), {3: 2})
+        self.assertEqual(reconcile_counters(), 0)
+
+
+class QueryIndexTests(TestCase):
+    """Запросы очередей, уведомлений и мониторинга используют индексы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="resp", password="123", role="respondent"
+        )
+
+    def assertUsesIndex(self, queryset, *index_names):
+        """Проверка плана запроса через EXPLAIN.
+
+        SQLite не применяет частичные индексы к запросам с параметрами,
+        поэтому допускается несколько подходящих индексов.
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # На маленькой тестовой таблице планировщик иначе
+                # предпочтёт последовательное чтение
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            elif connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+        plan = queryset.explain()
+        self.assertTrue(
+            any(name in plan for name in index_names),
+            f"Ни один из индексов {index_names} не используется:\n{plan}",
+        )
+
+    def test_ticket_queue_l1(self):
+        tickets = Ticket.objects.filter(
+            support_line=1, status__in=["open", "in_progress"]
+        ).order_by("-created_at")
+        self.assertUsesIndex(
+            tickets, "ticket_open_line_idx", "ticket_line_status_created_idx"
+        )
+
+    def test_ticket_queue_l2(self):
+        tickets = Ticket.objects.filter(
+            support_line=2, status="escalated"
+        ).order_by("-created_at")
+        self.assertUsesIndex(tickets, "ticket_line_status_created_idx")
+
+    def test_ticket_queue_l3(self):
+        # Обе ветви OR очереди L3 идут по индексам
+        tickets = Ticket.objects.filter(support_line=3)
+        self.assertUsesIndex(tickets, "ticket_line_status_created_idx")
+        watched = Ticket.objects.filter(l3_watch=True).order_by("-created_at")
+        self.assertUsesIndex(watched, "ticket_l3_watch_idx")
+
+    def test_submission_payload_key(self):
+        submissions = filter_by_payload(
+            DataSubmission.objects.all(), "student_id", 42
+        )
+        self.assertUsesIndex(
+            submissions, "submission_data_gin_idx", "core_submission_payload_key"
+        )
+
+    def test_notification_inbox(self):
+        notifications = Notification.objects.filter(
+            user=self.user
+        ).order_by("-created_at")
+        self.assertUsesIndex(notifications, "notification_user_created_idx")
+
+    def test_unread_notifications(self):
+        notifications = Notification.objects.filter(
+            user=self.user, is_read=False
+        ).order_by("-created_at")
+        self.assertUsesIndex(
+            notifications,
+            "notification_unread_idx",
+            "notification_user_created_idx",
+        )
+
+    def test_submission_monitoring(self):
+        submissions = DataSubmission.objects.order_by("-submitted_at")
+        self.assertUsesIndex(submissions, "submission_submitted_idx")
+        self.assertUsesIndex(
+            submissions.filter(channel=1), "submission_channel_idx"
+        )
+        self.assertUsesIndex(
+            submissions.filter(status="rejected"), "submission_status_idx"
+        )
+        self.assertUsesIndex(
+            submissions.filter(channel=1, status="rejected"),
+            "submission_channel_status_idx",
+        )
+
+    def test_pending_queue(self):
+        pending = DataSubmission.objects.filter(
+            status="pending"
+        ).order_by("id")
+        self.assertUsesIndex(
+            pending, "submission_pending_idx", "submission_status_idx"
+        )
+
+
+@mock.patch("core.views.ADMIN_PAGE_SIZE", 2)
+class AdminKeysetPaginationTests(TestCase):
+    """Курсорная пагинация таблицы мониторинга."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="adm", password="123", role="admin"
+        )
+        submissions = DataSubmission.objects.bulk_create([
+            DataSubmission(channel=1, status="accepted",
+                           data={"student_id": n})
+            for n in range(6)
+        ])
+        # Три заявки с одинаковым временем: среди них новее большой id
+        moment = timezone.now()
+        for offset, submission in zip((0, 1, 1, 1, 2, 3), submissions):
+            DataSubmission.objects.filter(pk=submission.pk).update(
+                submitted_at=moment - timedelta(minutes=offset)
+            )
+        DataSubmission.objects.create(
+            channel=2, status="pending", data={"student_id": 9}
+        )
+        order = (0, 3, 2, 1, 4, 5)
+        cls.expected = [submissions[index].pk for index in order]
+
+    def page(self, query=None):
+        response = self.client.get(f"{reverse('admin_data')}?{query or ''}")
+        context = response.context
+        ids = [submission.pk for submission in context["submissions"]]
+        return ids, context["next_query"], context["prev_query"]
+
+    def test_walk_forward_and_back(self):
+        self.client.force_login(self.admin)
+        pages = []
+        ids, next_query, prev_query = self.page("channel=1")
+        self.assertIsNone(prev_query)
+        pages.append(ids)
+        while next_query:
+            self.assertIn("channel=1", next_query)
+            ids, next_query, prev_query = self.page(next_query)
+            pages.append(ids)
+        self.assertEqual(
+            pages, [self.expected[0:2], self.expected[2:4], self.expected[4:6]]
+        )
+        backwards = []
+        while prev_query:
+            ids, _, prev_query = self.page(prev_query)
+            backwards.append(ids)
+        self.assertEqual(backwards, [self.expected[2:4], self.expected[0:2]])
+
+
+class SubmissionCounterTests(TestCase):
+    """Счётчики заявок по каналу, статусу и дню."""
+
+    def totals(self, model=SubmissionCounter):
+        return {
+            (counter.channel, counter.status): counter.total
+            for counter in model.objects.all()
+        }
+
+    def test_save_increments(self):
+        submission = DataSubmission.objects.create(
+            channel=1, status="pending", data={"name": "Иван"}
+        )
+        DataSubmission.objects.create(
+            channel=1, status="pending", data={"name": "Пётр"}
+        )
+        self.assertEqual(self.totals(), {(1, "pending"): 2})
+        submission.status = "accepted"
+        submission.save()
+        self.assertEqual(
+            self.totals(), {(1, "pending"): 1, (1, "accepted"): 1}
+        )
+        self.assertEqual(self.totals(SubmissionTotal), self.totals())
+        with self.assertNumQueries(1):
+            self.assertEqual(channel_totals(), {1: 2})
+
+    def test_save_uses_loaded_status(self):
+        created = DataSubmission.objects.create(
+            channel=1, status="pending", data={"name": "Иван"}
+        )
+        for status in ("accepted", "rejected"):
+            # Сохранённый объект и загруженный заново
+            submission = (
+                created if status == "accepted"
+                else DataSubmission.objects.get(pk=created.pk)
+            )
+            submission.status = status
+            with CaptureQueriesContext(connection) as queries:
+                submission.save()
+            self.assertFalse([
+                query for query in queries.captured_queries
+                if query["sql"].startswith('SELECT "core_datasubmission"')
+            ])
+        # Отложенный статус читается из БД
+        submission = DataSubmission.objects.only("id").get(pk=created.pk)
+        submission.status = "accepted"
+        submission.save()
+        self.assertEqual(channel_totals(), {1: 1})
+        self.assertEqual(self.totals()[1, "accepted"], 1)
+
+    def test_reconcile_command(self):
+        DataSubmission.objects.create(
+            channel=2, status="pending", data={"student_id": 1}
+        )
+        # Прямой UPDATE обходит счётчики
+        DataSubmission.objects.update(status="accepted")
+        SubmissionCounter.objects.create(
+            channel=3, status="rejected", day=timezone.localdate(), total=5
+        )
+        output = StringIO()
+        call_command("reconcile_submission_counters", stdout=output)
+        # Три строки по дням и две строки итогов
+        self.assertIn("Исправлено строк счётчиков: 5", output.getvalue())
+        self.assertEqual(self.totals(), {(2, "accepted"): 1})
+        self.assertEqual(self.totals(SubmissionTotal), {(2, "accepted"): 1})
+        self.assertEqual(reconcile_counters(), 0)
+
+    def test_delete_decrements(self):
+        kept = DataSubmission.objects.create(
+            channel=2, status="pending", data={"student_id": 1}
+        )
+        DataSubmission.objects.create(
+            channel=2, status="pending", data={"student_id": 2}
+        ).delete()
+        upload = DataSubmission.objects.create(
+            channel=3, status="accepted", file_upload="submissions/rows.csv"
+        )
+        DataSubmission.objects.bulk_create([
+            DataSubmission(channel=3, status="pending", source_file=upload,
+                           row_number=n, data={"student_id": n})
+            for n in range(3)
+        ])
+        reconcile_counters()
+        self.assertEqual(channel_totals(), {2: 1, 3: 3})
+        # Строки файла удаляются каскадом одним пересчётом счётчиков
+        with CaptureQueriesContext(connection) as queries, \
+                batched_counter_updates():
+            upload.delete()
+        counter_updates = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "core_submissioncounter"')
+        ]
+        self.assertEqual(len(counter_updates), 1)
+        kept.delete()
+        self.assertEqual(channel_totals(), {2: 0, 3: 0})
+        self.assertEqual(reconcile_counters(), 0)
+
+
+class NotificationInboxTests(TestCase):
+    """Постраничный просмотр уведомлений."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="resp", password="123", role="respondent"
+        )
+        now = timezone.now()
+        # Прочитанные уведомления новее непрочитанных
+        for minutes, is_read in ((1, True), (2, True), (3, False), (4, False)):
+            note = Notification.objects.create(
+                user=cls.user, message=f"{minutes}", is_read=is_read
+            )
+            Notification.objects.filter(pk=note.pk).update(
+                created_at=now - timedelta(minutes=minutes)
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def messages(self, notes):
+        return [note.message for note in notes]
+
+    def test_unread_block_and_history(self):
+        response = self.client.get(reverse("notifications"))
+        self.assertEqual(self.messages(response.context["unread"]), ["3", "4"])
+        self.assertEqual(
+            self.messages(response.context["notifications"]), ["1", "2"]
+        )
+
+    @mock.patch("core.views.INBOX_PAGE_SIZE", 1)
+    def test_only_shown_marked_read(self):
+        def unread():
+            return self.messages(Notification.objects.filter(is_read=False))
+
+        response = self.client.get(reverse("notifications"))
+        self.assertEqual(self.messages(response.context["unread"]), ["3"])
+        self.assertEqual(unread(), ["4"])
+        # Страницы истории непрочитанное не показывают и не отмечают
+        self.client.get(
+            reverse("notifications"),
+            {"cursor": response.context["older_cursor"]},
+        )
+        self.assertEqual(unread(), ["4"])
+        self.client.get(reverse("notifications"))
+        self.assertEqual(unread(), [])
+
+    @mock.patch("core.views.INBOX_PAGE_SIZE", 1)
+    def test_history_starts_at_newest(self):
+        response = self.client.get(reverse("notifications"))
+        self.assertEqual(self.messages(response.context["unread"]), ["3"])
+        shown = self.messages(response.context["notifications"])
+        while response.context["older_cursor"]:
+            response = self.client.get(
+                reverse("notifications"),
+                {"cursor": response.context["older_cursor"]},
+            )
+            shown += self.messages(response.context["notifications"])
+        # Показанное непрочитанное уже попало в историю
+        self.assertEqual(shown, ["1", "2", "3"])
+        self.assertEqual(
+            Notification.objects.filter(is_read=False).count(), 1
+        )
+
+
+class UnreadCountTests(TestCase):
+    """Кэшированный счётчик непрочитанных уведомлений."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="resp", password="123", role="respondent"
+        )
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.client.force_login(self.user)
+
+    def count(self):
+        response = self.client.get(reverse("notifications_unread_count"))
+        return response.json()["unread"]
+
+    def test_increment_and_reset(self):
+        self.assertEqual(self.count(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.user, message="Одно")
+            notify_users([self.user.pk, self.user.pk], "Ещё")
+        # Счётчик обновлён в кэше, COUNT не нужен
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 3)
+        self.assertEqual(self.count(), 3)
+        self.client.get(reverse("notifications"))
+        self.assertEqual(self.count(), 0)
+
+
+class TicketEventTests(TestCase):
+    """События заявок для агентов поддержки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="prov", password="123", role="provider"
+        )
+
+    def test_audience(self):
+        cases = [
+            (Ticket(support_line=1, status="open"), {1}),
+            (Ticket(support_line=1, status="new", l3_watch=True), {1, 3}),
+            (Ticket(support_line=2, status="escalated"), {2}),
+            (Ticket(support_line=3, status="escalated", l3_watch=True), {3}),
+        ]
+        for ticket, levels in cases:
+            self.assertEqual(ticket_audience(ticket), levels)
+
+    async def test_delivered_to_audience_levels(self):
+        broker = InProcessBroker()
+        subscriptions = {level: broker.subscribe(level) for level in (1, 2, 3)}
+        ticket = Ticket(
+            id=1, subject="Тема", support_line=2, status="escalated",
+            category="system_performance", l3_watch=True,
+        )
+        with mock.patch("core.events.get_broker", return_value=broker):
+            publish_ticket_event("escalated", ticket)
+        received = {
+            level: await subscription.get(timeout=0.1)
+            for level, subscription in subscriptions.items()
+        }
+        self.assertIsNone(received[1])
+        self.assertEqual(received[2], ticket_event("escalated", ticket))
+        self.assertEqual(received[3], received[2])
+        for subscription in subscriptions.values():
+            await subscription.close()
+
+    def test_status_event_only_on_change(self):
+        ticket = Ticket.objects.create(
+            subject="Тема", description="Текст", user=self.author,
+            support_line=1, status="open",
+        )
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        with mock.patch("core.signals.publish_ticket_event") as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            ticket.status = "resolved"
+            ticket.save()
+            # Повторное сохранение решённой заявки — не новое событие
+            ticket.description = "Дополнено"
+            ticket.save()
+            Ticket.objects.get(pk=ticket.pk).save()
+        publish.assert_called_once_with("resolved", ticket)
+
+
+class LoadDataTests(TestCase):
+    """Команда generate_load_data."""
+
+    def generate(self, **options):
+        sizes = {"users": 20, "submissions": 50, "tickets": 30,
+                 "notifications": 30}
+        call_command("generate_load_data", stdout=StringIO(),
+                     **{**sizes, **options})
+
+    def test_counts_and_weights(self):
+        call_command(
+            "generate_load_data", "--users=30", "--submissions=40",
+            "--tickets=20", "--notifications=25",
+            "--role-weights=respondent:1,support:1,provider:0",
+            "--support-level-weights=2:1",
+            "--channel-weights=2:1", "--status-weights=accepted:1",
+            "--category-weights=api_issue:1", stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(
+            set(User.objects.values_list("role", flat=True)),
+            {"respondent", "support"},
+        )
+        self.assertEqual(
+            set(User.objects.filter(role="support")
+                .values_list("support_level", flat=True)),
+            {2},
+        )
+        self.assertEqual(
+            set(DataSubmission.objects.values_list("channel", "status")),
+            {(2, "accepted")},
+        )
+        self.assertEqual(channel_totals(), {2: 40})
+        self.assertEqual(
+            set(Ticket.objects.values_list("category", flat=True)),
+            {"api_issue"},
+        )
+        self.assertEqual(Notification.objects.count(), 25)
+
+    def test_seed_is_reproducible(self):
+        def dataset(prefix, seed):
+            self.generate(prefix=prefix, seed=seed)
+            rows = DataSubmission.objects.order_by("-id")[:50]
+            return [
+                (row.channel, row.status, row.data, row.submitted_at)
+                for row in reversed(rows)
+            ]
+
+        first = dataset("a", 7)
+        self.assertEqual(dataset("b", 7), first)
+        self.assertNotEqual(dataset("c", 8), first)
+
+    def test_anchor_date_and_queue_versions(self):
+        self.addCleanup(cache.clear)
+        versions = [queue_version(level) for level in (1, 2, 3)]
+        self.generate(anchor_date="2025-06-01", days=10)
+        anchor = timezone.make_aware(datetime(2025, 6, 1))
+        dates = Ticket.objects.values_list("created_at", flat=True)
+        self.assertTrue(all(
+            anchor - timedelta(days=10) <= date <= anchor for date in dates
+        ))
+        self.assertTrue(all(
+            queue_version(level) != version
+            for level, version in zip((1, 2, 3), versions)
+        ))
+
+
+class BenchmarkTests(TestCase):
+    """Сценарии бенчмарков и сравнение с базовым отчётом."""
+
+    def test_every_route_covered(self):
+        routes = {
+            name for name in get_resolver("core.urls").reverse_dict
+            if isinstance(name, str)
+        }
+        covered = {scenario[0] for scenario in SCENARIOS.values()}
+        self.assertEqual(routes - covered - set(SKIPPED_ROUTES), set())
+
+    def test_run_report(self):
+        users = seed_dataset(
+            {"users": 10, "submissions": 20, "tickets": 10,
+             "notifications": 20}
+        )
+        report = run_benchmarks(
+            users, repeats=1,
+            scenarios=["dashboard", "ticket_detail", "api_data_submission"],
+        )
+        self.assertEqual(report["views"]["dashboard"]["status"], 200)
+        self.assertEqual(report["views"]["ticket_detail"]["status"], 200)
+        self.assertEqual(
+            report["views"]["api_data_submission"]["status"], 201
+        )
+        self.assertGreater(report["views"]["dashboard"]["queries"], 0)
+        self.assertEqual(compare_reports(report, report), [])
+
+    def test_budget_exceeded(self):
+        baseline = {"views": {"dashboard": {
+            "status": 200, "queries": 2, "time_ms": 10.0, "peak_kb": 40,
+        }}}
+        report = {"views": {"dashboard": {
+            "status": 200, "queries": 3, "time_ms": 30.0, "peak_kb": 100,
+        }}}
+        self.assertEqual(len(compare_reports(report, baseline)), 3)
+        self.assertEqual(
+            compare_reports({"views": {}}, baseline),
+            ["dashboard: сценарий не выполнялся"],
+        )
+
+    def test_server_error_is_violation(self):
+        result = {"status": 500, "queries": 0, "time_ms": 1.0, "peak_kb": 1}
+        report = {"views": {"dashboard": result}}
+        self.assertEqual(
+            compare_reports(report, report), ["dashboard: статус 500"]
+        )
+
+    def test_seed_reuses_users(self):
+        sizes = {"users": 1, "submissions": 1, "tickets": 1,
+                 "notifications": 1}
+        first = seed_dataset(sizes)
+        self.assertEqual(seed_dataset(sizes), first)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """Представления укладываются в объявленные бюджеты запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(
+            {"users": 20, "submissions": 100, "tickets": 100,
+             "notifications": 100}
+        )
+
+    def get(self, user, url_name):
+        self.client.force_login(self.users[user])
+        response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("db;dur=", response.headers["Server-Timing"])
+        return response
+
+    def test_ticket_lists(self):
+        for user in ("l1", "l2", "l3"):
+            self.get(user, "ticket_list")
+
+    def test_ticket_detail(self):
+        ticket = Ticket.objects.create(
+            subject="Тема", description="Текст", user=self.users["provider"],
+            support_line=1, status="open",
+        )
+        self.client.force_login(self.users["l1"])
+        response = self.client.get(reverse("ticket_detail", args=[ticket.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_pages(self):
+        self.get("respondent", "dashboard")
+        self.get("admin", "admin_data")
+        self.get("l1", "notifications")
+        self.get("l1", "notifications_unread_count")
+
+    def test_api_batch(self):
+        records = [
+            {"provider_name": "p", "data": {"name": str(i)}}
+            for i in range(50)
+        ]
+        response = self.client.post(
+            reverse("api_data_batch_submission"),
+            records, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+    async def test_async_requests(self):
+        await self.async_client.aforce_login(self.users["l1"])
+        response = await self.async_client.get(reverse("ticket_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('desc="0 queries"', response.headers["Server-Timing"])
+
+        # Поток SSE не учитывается: он читает БД уже после ответа
+        response = await self.async_client.get(reverse("ticket_events"))
+        self.assertNotIn("Server-Timing", response.headers)
+        stream = response.streaming_content
+        await anext(stream)
+        await stream.aclose()
+
+    def test_budget_exceeded(self):
+        @query_budget(1)
+        def view(request):
+            list(User.objects.all())
+            list(User.objects.all())
+            return HttpResponse()
+
+        request = RequestFactory().get("/")
+        middleware = QueryCountMiddleware(
+            lambda request: view(request)
+        )
+        middleware.process_view(request, view, (), {})
+        with self.assertRaises(QueryBudgetExceeded):
+            middleware(request)
+
+    def test_duplicate_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s)'),
+        )
+        with self.assertLogs("core.sql", "WARNING") as logs:
+            self.client.force_login(self.users["l1"])
+            middleware = QueryCountMiddleware(self.repeat_queries)
+            middleware(RequestFactory().get("/"))
+        self.assertIn("N+1", logs.output[0])
+
+    def repeat_queries(self, request):
+        for user in self.users.values():
+            User.objects.get(pk=user.pk)
+        return HttpResponse()
+
+
+class MetricsTests(TestCase):
+    """Эндпоинт метрик Prometheus."""
+
+    def test_metrics(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("api_data_submission"),
+                {"provider_name": "p", "data": {"name": "Иван"}},
+                content_type="application/json",
+            )
+            validate_pending_batch()
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{method="POST",'
+            'view="api_data_submission"}', text
+        )
+        self.assertIn(
+            'data_submissions_total{channel="api",status="accepted"}', text
+        )
+
+    def test_pool_stats(self):
+        class Pool:
+            def get_stats(self):
+                return {"pool_size": 4, "pool_available": 1,
+                        "requests_num": 10, "requests_wait_ms": 1500}
+
+        self.enterContext(
+            mock.patch.object(connection, "pool", Pool(), create=True)
+        )
+        text = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('db_pool_connections_in_use{alias="default"} 3.0', text)
+        self.assertIn('db_pool_wait_seconds_total{alias="default"} 1.5', text)
+
+    @skipUnless(psycopg_pool, "psycopg_pool не установлен")
+    def test_real_pool_stats(self):
+        # Сервера нет: запрос соединения завершится таймаутом
+        pool = psycopg_pool.ConnectionPool(
+            "host=/nonexistent dbname=none", min_size=0, max_size=1,
+        )
+        self.addCleanup(pool.close, timeout=1)
+        self.enterContext(
+            mock.patch.object(connection, "pool", pool, create=True)
+        )
+        with mock.patch.object(
+            logging.getLogger("psycopg.pool"), "disabled", True
+        ), self.assertRaises(psycopg_pool.PoolTimeout):
+            pool.getconn(timeout=0.1)
+        text = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('db_pool_requests_total{alias="default"} 1.0', text)
+        self.assertIn('db_pool_errors_total{alias="default"} 1.0', text)
+        self.assertIn('db_pool_requests_waiting{alias="default"}', text)
+        self.assertNotIn(
+            'db_pool_wait_seconds_total{alias="default"} 0.0', text
+        )
+
+    def test_remote_forbidden(self):
+        response = self.client.get(
+            reverse("metrics"), REMOTE_ADDR="10.0.0.1"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class ValidationSchemaTests(TestCase):
+    """Схемы валидации из базы данных."""
+
+    def test_rules(self):
+        validate = compile_schema({
+            "student_id": {"required": True, "type": "integer", "min": 1},
+            "name": {"type": "string", "max_length": 5},
+            "grade": {"choices": ["A", "B"]},
+        })
+        self.assertEqual(validate({"student_id": "12", "name": "Иван"}), {})
+        self.assertEqual(
+            validate({"student_id": 0, "name": "Иннокентий", "grade": "C"}),
+            {
+                "student_id": "Значение меньше 1",
+                "name": "Длина больше 5",
+                "grade": "Недопустимое значение",
+            },
+        )
+        self.assertEqual(
+            validate({"student_id": "abc"}),
+            {"student_id": "Ожидается целое число"},
+        )
+        self.assertEqual(validate({}), {"student_id": "Обязательное поле"})
+
+    def test_invalid_schema(self):
+        schema = ValidationSchema(channel=1, fields={"name": {"typ": "x"}})
+        with self.assertRaises(ValidationError):
+            schema.full_clean()
+
+    def test_recompiled_on_change(self):
+        # Откат транзакции теста не сбрасывает скомпилированные схемы
+        self.addCleanup(invalidate_schemas)
+        records = [{"name": "Иван"}]
+        self.assertEqual(validate_records(1, records), [{}])
+        with self.captureOnCommitCallbacks(execute=True):
+            ValidationSchema.objects.filter(channel=1).get().delete()
+            ValidationSchema.objects.create(
+                channel=1, fields={"score": {"required": True}}
+            )
+        self.assertEqual(
+            validate_records(1, records), [{"score": "Обязательное поле"}]
+        )
+
+    def test_pending_batch(self):
+        DataSubmission.objects.bulk_create([
+            DataSubmission(channel=2, status="pending",
+                           data={"student_id": 1, "name": "Иван"}),
+            DataSubmission(channel=2, status="pending",
+                           data={"student_id": -1}),
+        ])
+        validate_pending_batch()
+        accepted, rejected = DataSubmission.objects.order_by("id")
+        self.assertEqual(accepted.status, "accepted")
+        self.assertEqual(rejected.status, "rejected")
+        # Исходные схемы проверяют только наличие полей
+        self.assertEqual(
+            rejected.validation_errors, {"name": "Обязательное поле"}
+        )
+
+
+class SubmissionDedupTests(TestCase):
+    """Повторные запросы API не создают новых заявок."""
+
+    record = {"provider_name": "p", "data": {"name": "Иван"}}
+
+    def post(self, url_name, body, key=None):
+        headers = {"Idempotency-Key": key} if key else {}
+        return self.client.post(
+            reverse(url_name), body, content_type="application/json",
+            headers=headers,
+        )
+
+    def test_content_hash(self):
+        first = self.post("api_data_submission", self.record)
+        second = self.post("api_data_submission", self.record)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.json()["duplicate"])
+        self.assertEqual(
+            second.json()["submission_id"], first.json()["submission_id"]
+        )
+        self.assertEqual(DataSubmission.objects.count(), 1)
+
+    def test_window_expired(self):
+        with self.settings(SUBMISSION_DEDUP_WINDOW=0):
+            self.post("api_data_submission", self.record)
+            response = self.post("api_data_submission", self.record)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(DataSubmission.objects.count(), 2)
+
+    def test_idempotency_key(self):
+        first = self.post("api_data_submission", self.record, key="k1")
+        other = {"provider_name": "p", "data": {"name": "Пётр"}}
+        conflict = self.post("api_data_submission", other, key="k1")
+        self.assertEqual(conflict.status_code, 422)
+        retry = self.post("api_data_submission", self.record, key="k1")
+        self.assertEqual(
+            retry.json()["submission_id"], first.json()["submission_id"]
+        )
+        self.assertEqual(DataSubmission.objects.count(), 1)
+
+    def test_batch(self):
+        records = [self.record, self.record, {"provider_name": "p",
+                                              "data": {"name": "Пётр"}}]
+        first = self.post("api_data_batch_submission", records)
+        self.assertEqual(first.json()["created"], 2)
+        self.assertEqual(first.json()["duplicates"], 1)
+        retry = self.post("api_data_batch_submission", records)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json()["duplicates"], 3)
+        self.assertEqual(DataSubmission.objects.count(), 2)
+
+    def test_concurrent_retry(self):
+        original = self.post("api_data_submission", self.record)
+        calls = []
+
+        def lookup(keys):
+            # Параллельный запрос не увидел отпечаток при поиске и
+            # упирается в уникальный ключ при записи
+            calls.append(keys)
+            return {} if len(calls) == 1 else find_fingerprints(keys)
+
+        with mock.patch("core.ingestion.find_fingerprints", lookup):
+            response = self.post("api_data_submission", self.record)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["submission_id"], original.json()["submission_id"]
+        )
+        self.assertEqual(DataSubmission.objects.count(), 1)
+
+
+class CachedAuthTests(TestCase):
+    """Повторные запросы не обращаются к сессиям и пользователям в БД."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="agent", password="123", role="support",
+            support_level=1,
+        )
+        self.client.force_login(self.user)
+
+    def test_zero_auth_queries(self):
+        url = reverse("notifications_unread_count")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.json(), {"unread": 0})
+
+    def test_invalidated_on_save(self):
+        self.client.get(reverse("notifications_unread_count"))
+        self.user.role = "respondent"
+        self.user.save()
+        response = self.client.get(reverse("ticket_list"))
+        self.assertRedirects(response, reverse("dashboard"),
+                             fetch_redirect_response=False)
+
+
+class TicketQueueCacheTests(TestCase):
+    """Кэш таблицы очереди общий для уровня и сбрасывается изменениями."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="123", role="provider"
+        )
+        cls.agents = [
+            User.objects.create_user(
+                username=f"l{level}_{n}", password="123", role="support",
+                support_level=level,
+            )
+            for level in (1, 2) for n in range(2)
+        ]
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket = Ticket.objects.create(
+                subject="Маркер очереди", description="Текст", user=self.author,
+                support_line=1, status="open",
+            )
+
+    def queue(self, agent):
+        self.client.force_login(agent)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("ticket_list"))
+        ticket_queries = [
+            query for query in queries if "core_ticket" in query["sql"]
+        ]
+        return response.content.decode(), ticket_queries
+
+    def test_shared_by_level(self):
+        first, queries = self.queue(self.agents[0])
+        self.assertIn("Маркер очереди", first)
+        self.assertEqual(len(queries), 1)
+        second, queries = self.queue(self.agents[1])
+        self.assertIn("Маркер очереди", second)
+        self.assertEqual(queries, [])
+
+    def test_escalation_bumps_versions(self):
+        self.queue(self.agents[0])
+        self.queue(self.agents[2])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.support_line = 2
+            self.ticket.status = "escalated"
+            self.ticket.save()
+        l1, _ = self.queue(self.agents[1])
+        l2, queries = self.queue(self.agents[3])
+        self.assertNotIn("Маркер очереди", l1)
+        self.assertIn("Маркер очереди", l2)
+        self.assertEqual(len(queries), 1)
+
+
+class TicketApiTests(TestCase):
+    """JSON API заявок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="123", role="provider"
+        )
+        cls.agent = User.objects.create_user(
+            username="agent", password="123", role="support",
+            support_level=1,
+        )
+        Ticket.objects.bulk_create([
+            Ticket(subject=f"Заявка {n}", description="Текст",
+                   user=cls.author, support_line=1, status="open")
+            for n in range(120)
+        ])
+        cls.hidden = Ticket.objects.create(
+            subject="L2", description="Текст", user=cls.author,
+            support_line=2, status="escalated",
+        )
+
+    def setUp(self):
+        self.client.force_login(self.agent)
+
+    def test_pagination_and_fields(self):
+        url = reverse("api_ticket_list")
+        response = self.client.get(url, {"fields": "id,author"})
+        page = response.json()
+        self.assertEqual(len(page["results"]), 50)
+        self.assertEqual(set(page["results"][0]), {"id", "author"})
+        seen = {item["id"] for item in page["results"]}
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            seen.update(item["id"] for item in page["results"])
+        self.assertEqual(len(seen), 120)
+        self.assertNotIn(self.hidden.id, seen)
+
+    def test_fixed_queries(self):
+        self.client.get(reverse("notifications_unread_count"))
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("api_ticket_list"), {"page_size": 1000}
+            )
+        self.assertEqual(len(response.json()["results"]), 120)
+
+    def test_not_modified(self):
+        url = reverse("api_ticket_list")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        ticket = Ticket.objects.filter(support_line=1).first()
+        ticket.subject = "Изменена"
+        ticket.save()
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail(self):
+        ticket = Ticket.objects.filter(support_line=1).first()
+        url = reverse("api_ticket_detail", args=[ticket.id])
+        response = self.client.get(url)
+        self.assertEqual(response.json()["id"], ticket.id)
+        response = self.client.get(
+            url, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            reverse("api_ticket_detail", args=[self.hidden.id])
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class TicketBulkActionTests(TestCase):
+    """Массовая эскалация и решение заявок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="123", role="provider"
+        )
+        cls.l1 = User.objects.create_user(
+            username="l1", password="123", role="support", support_level=1
+        )
+        cls.l2 = User.objects.create_user(
+            username="l2", password="123", role="support", support_level=2
+        )
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.tickets = [
+            Ticket.objects.create(
+                subject=f"Заявка {n}", description="Текст", user=self.author,
+                support_line=1, status=status,
+            )
+            for n, status in enumerate(["open", "in_progress", "resolved"])
+        ]
+        self.ids = [ticket.id for ticket in self.tickets]
+
+    def post(self, user, **data):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse("ticket_bulk_action"), {"ticket_ids": self.ids, **data},
+            HTTP_ACCEPT="application/json",
+        )
+
+    def test_escalate_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(self.l1, action="escalate", to_level="3")
+        self.assertEqual(response.json(), {
+            "changed": self.ids[:2], "skipped": self.ids[2:],
+        })
+        updates = [
+            query for query in queries
+            if query["sql"].startswith('UPDATE "core_ticket"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            set(Ticket.objects.filter(support_line=3)
+                .values_list("status", flat=True)),
+            {"escalated"},
+        )
+
+    def test_update_at_stored_like_orm(self):
+        self.post(self.l1, action="escalate", to_level="2")
+        self.tickets[2].save()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT "update_at" FROM "core_ticket" WHERE "id" IN (%s, %s) '
+                'ORDER BY "id"', [self.ids[0], self.ids[2]],
+            )
+            raw, orm = [
+                re.sub(r"\d", "0", str(value)) for value, in cursor.fetchall()
+            ]
+        self.assertEqual(raw, orm)
+
+    def test_resolve_rules_by_level(self):
+        response = self.post(self.l2, action="resolve")
+        self.assertEqual(response.json()["changed"], [])
+        response = self.post(self.l1, action="resolve")
+        self.assertEqual(response.json()["changed"], self.ids[:1])
+        self.assertEqual(
+            Ticket.objects.get(id=self.ids[1]).status, "in_progress"
+        )
+
+    def test_l2_cannot_escalate(self):
+        response = self.post(self.l2, action="escalate")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Ticket.objects.filter(support_line=2).exists())
+
+    def test_malformed_request(self):
+        response = self.post(self.l1, action="escalate", to_level="два")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post(self.l1, action="delete").status_code, 400)
+        response = self.post(self.l1, action="escalate", to_level="5")
+        self.assertEqual(response.status_code, 403)
+
+    def test_events_and_queue_versions(self):
+        self.client.force_login(self.l1)
+        self.client.get(reverse("ticket_list"))
+        with mock.patch("core.triage.publish_ticket_event") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post(self.l1, action="escalate", to_level="2")
+        self.assertEqual(publish.call_count, 2)
+        response = self.client.get(reverse("ticket_list"))
+        self.assertNotContains(response, "Заявка 0")
+
+
+class TicketRoutingTests(TestCase):
+    """Маршрутизация заявок по правилам при создании."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.provider = User.objects.create_user(
+            username="prov", password="123", role="provider"
+        )
+
+    def setUp(self):
+        self.addCleanup(invalidate_routes)
+        self.client.force_login(self.provider)
+
+    def create(self, category):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse("ticket_create"), {
+                "subject": "Тема", "description": "Текст",
+                "category": category,
+            })
+        writes = [
+            query for query in queries
+            if 'INTO "core_ticket"' in query["sql"]
+            or query["sql"].startswith('UPDATE "core_ticket"')
+        ]
+        self.assertEqual(len(writes), 1)
+        return Ticket.objects.latest("id")
+
+    def test_default_rules(self):
+        ticket = self.create("system_performance")
+        self.assertEqual(
+            (ticket.support_line, ticket.status, ticket.l3_watch),
+            (2, "escalated", True),
+        )
+        ticket = self.create("schedule")
+        self.assertEqual((ticket.support_line, ticket.status), (1, "new"))
+
+    def test_source_rule_and_invalidation(self):
+        self.assertEqual(route_ticket("notification", "upload").support_line, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            RoutingRule.objects.create(
+                category="notification", source="upload", support_line=2,
+                status="escalated",
+            )
+        self.assertEqual(route_ticket("notification", "upload").support_line, 2)
+        self.assertEqual(route_ticket("notification", "form").support_line, 1)
+
+
+class TicketSearchTests(TestCase):
+    """Полнотекстовый поиск заявок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="123", role="provider"
+        )
+        cls.l1 = User.objects.create_user(
+            username="l1", password="123", role="support", support_level=1
+        )
+        cls.slow = Ticket.objects.create(
+            subject="Система медленно загружает файлы",
+            description="Загрузка занимает минуты", user=cls.author,
+            support_line=1, status="open",
+        )
+        cls.api = Ticket.objects.create(
+            subject="Ошибка API", description="Медленный ответ сервера",
+            user=cls.author, support_line=1, status="open",
+        )
+        cls.hidden = Ticket.objects.create(
+            subject="Медленная загрузка", description="", user=cls.author,
+            support_line=2, status="escalated",
+        )
+
+    def search(self, query, **params):
+        self.client.force_login(self.l1)
+        response = self.client.get(
+            reverse("api_ticket_search"), {"q": query, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, data):
+        return [ticket["id"] for ticket in data["results"]]
+
+    def test_stemming_rank_and_visibility(self):
+        # Тема весит больше описания; заявка L2 агенту L1 не видна
+        self.assertEqual(
+            self.ids(self.search("медленная загрузка")), [self.slow.id]
+        )
+        self.assertEqual(
+            self.ids(self.search("медленный")), [self.slow.id, self.api.id]
+        )
+
+    def test_index_follows_updates(self):
+        Ticket.objects.filter(id=self.api.id).update(subject="Сбой шлюза")
+        self.assertEqual(self.ids(self.search("шлюз")), [self.api.id])
+        self.assertEqual(self.ids(self.search("ошибка")), [])
+
+    def test_pagination(self):
+        first = self.search("медленный", page_size=1)
+        self.assertEqual(len(first["results"]), 1)
+        self.assertIn("page=2", first["next"])
+        second = self.search("медленный", page_size=1, page=2)
+        self.assertEqual(self.ids(second), [self.api.id])
+        self.assertIsNone(second["next"])
+
+    def test_l3_queue(self):
+        l3 = User.objects.create_user(
+            username="l3", password="123", role="support", support_level=3
+        )
+        Ticket.objects.filter(id=self.api.id).update(l3_watch=True)
+        self.client.force_login(l3)
+        response = self.client.get(
+            reverse("api_ticket_search"), {"q": "медленный"}
+        )
+        self.assertEqual(self.ids(response.json()), [self.api.id])
+
+    def test_html_page(self):
+        self.client.force_login(self.l1)
+        response = self.client.get(reverse("ticket_search"), {"q": "файлы"})
+        self.assertContains(response, "Система медленно загружает файлы")
+        self.assertNotContains(response, "Ошибка API")
+
+
+class SubmissionPayloadIndexTests(TestCase):
+    """Поиск заявок по полям данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="adm", password="123", role="admin"
+        )
+        cls.online = DataSubmission.objects.create(
+            channel=2, status="accepted", data={"student_id": 42, "name": "А"}
+        )
+        cls.csv, cls.other = DataSubmission.objects.bulk_create([
+            DataSubmission(channel=3, status="pending",
+                           data={"student_id": "42", "score": "5"}),
+            DataSubmission(channel=3, status="pending",
+                           data={"student_id": "7"}),
+        ])
+
+    def find(self, key, value):
+        return sorted(filter_by_payload(
+            DataSubmission.objects.all(), key, value
+        ).values_list("id", flat=True))
+
+    def test_lookup_by_value(self):
+        self.assertEqual(self.find("student_id", 42),
+                         sorted([self.online.id, self.csv.id]))
+        self.assertEqual(self.find("student_id", "7"), [self.other.id])
+        with self.assertRaises(ValueError):
+            self.find("name", "А")
+
+    def test_index_follows_changes(self):
+        DataSubmission.objects.filter(id=self.other.id).update(
+            data={"student_id": 42}
+        )
+        self.online.delete()
+        self.assertEqual(self.find("student_id", 42),
+                         sorted([self.csv.id, self.other.id]))
+        self.assertEqual(self.find("student_id", 7), [])
+
+    def test_keys_setting_change(self):
+        with override_settings(SUBMISSION_PAYLOAD_KEYS=["student_id", "name"]):
+            refresh_payload_index(connection)
+            self.assertEqual(self.find("name", "А"), [self.online.id])
+
+    def test_admin_dashboard_filter(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse("admin_data"), {"key": "student_id", "value": "7"}
+        )
+        ids = [submission.id for submission in response.context["submissions"]]
+        self.assertEqual(ids, [self.other.id])
+
+
+class SubmissionArchiveTests(TestCase):
+    """Перенос старых заявок данных в архив."""
+
+    def setUp(self):
+        old = timezone.now() - timedelta(days=400)
+        self.file = DataSubmission.objects.create(
+            channel=3, status="accepted"
+        )
+        self.rows = DataSubmission.objects.bulk_create([
+            DataSubmission(channel=3, status="accepted", source_file=self.file,
+                           row_number=n, data={"student_id": n})
+            for n in range(3)
+        ])
+        self.pending = DataSubmission.objects.create(
+            channel=2, status="pending", data={"student_id": 9}
+        )
+        DataSubmission.objects.update(submitted_at=old)
+        self.fresh = DataSubmission.objects.create(
+            channel=2, status="accepted", data={"student_id": 1}
+        )
+        reconcile_counters()
+
+    def test_batches_are_resumable(self):
+        cutoff = retention_cutoff(365)
+        # Файл ждёт переноса своих строк
+        self.assertEqual(archive_batch(cutoff, batch_size=2), 2)
+        self.assertTrue(DataSubmission.objects.filter(id=self.file.id).exists())
+        self.assertEqual(archive_batch(cutoff, batch_size=2), 1)
+        self.assertEqual(archive_batch(cutoff, batch_size=2), 1)
+        self.assertEqual(archive_batch(cutoff, batch_size=2), 0)
+        self.assertEqual(
+            set(DataSubmission.objects.values_list("id", flat=True)),
+            {self.pending.id, self.fresh.id},
+        )
+        archived = ArchivedSubmission.objects.get(id=self.rows[1].id)
+        self.assertEqual(archived.data, {"student_id": 1})
+        self.assertEqual(archived.source_file_id, self.file.id)
+        totals = channel_totals()
+        self.assertEqual((totals[2], totals.get(3, 0)), (2, 0))
+
+    def test_command_and_query(self):
+        call_command("archive_submissions", sleep=0, stdout=StringIO())
+        self.assertEqual(ArchivedSubmission.objects.count(), 4)
+        since = timezone.now() - timedelta(days=500)
+        self.assertEqual(
+            [submission.id for submission in archived_submissions(since)],
+            sorted([self.file.id, *[row.id for row in self.rows]],
+                   reverse=True),
+        )
+        self.assertFalse(archived_submissions(until=since).exists())
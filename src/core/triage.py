@@ -0,0 +1,126 @@
+"""Массовая эскалация и решение заявок из очереди.
+
+Каждый переход выполняется одним условным UPDATE: меняются только
+заявки из списка, которые всё ещё находятся в нужной линии и статусе,
+а изменённые строки возвращаются через RETURNING. Заявку, которую уже
+успел обработать другой агент, запрос просто не затронет.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .events import publish_ticket_event
+from .models import Ticket
+from .queues import bump_queue_versions, queue_levels
+
+BULK_ACTION_MAX_IDS = 1000
+RETURNED_FIELDS = (
+    "id", "subject", "category", "l3_watch", "support_line", "status",
+)
+
+
+class TriageError(Exception):
+    """Действие недоступно агенту или задано неверно."""
+
+
+def escalation_rule(user, to_level):
+    """(линия, допустимые статусы, изменения) для эскалации."""
+    if user.support_level != 1:
+        raise TriageError("Только L1 может эскалировать")
+    if to_level not in (2, 3):
+        raise TriageError("Эскалировать можно на уровень L2 или L3")
+    return 1, ("open", "in_progress"), {
+        "support_line": to_level, "status": "escalated",
+    }
+
+
+def resolve_rule(user):
+    """(линия, допустимые статусы, изменения) для решения заявок."""
+    if user.support_level == 1:
+        return 1, ("open",), {"status": "resolved"}
+    if user.support_level == 2:
+        return 2, ("escalated",), {"status": "resolved"}
+    raise TriageError("Решать заявки могут только L1 и L2")
+
+
+def column(name):
+    return connection.ops.quote_name(Ticket._meta.get_field(name).column)
+
+
+def prep(name, value):
+    field = Ticket._meta.get_field(name)
+    return field.get_db_prep_value(value, connection, prepared=False)
+
+
+def update_returning(ids, line, statuses, changes):
+    """UPDATE ... WHERE id IN (...) AND линия AND статус RETURNING ..."""
+    assignments = ", ".join(f"{column(name)} = %s" for name in changes)
+    sql = (
+        f"UPDATE {connection.ops.quote_name(Ticket._meta.db_table)} "
+        f"SET {assignments} "
+        f"WHERE {column('id')} IN ({', '.join(['%s'] * len(ids))}) "
+        f"AND {column('support_line')} = %s "
+        f"AND {column('status')} IN ({', '.join(['%s'] * len(statuses))}) "
+        f"RETURNING {', '.join(column(name) for name in RETURNED_FIELDS)}"
+    )
+    # Значения приводятся к формату СУБД так же, как при записи через ORM
+    params = [
+        *(prep(name, value) for name, value in changes.items()),
+        *(prep("id", ticket_id) for ticket_id in ids),
+        prep("support_line", line),
+        *(prep("status", status) for status in statuses),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [dict(zip(RETURNED_FIELDS, row)) for row in cursor.fetchall()]
+
+
+def update_locked(ids, line, statuses, changes):
+    """Тот же переход для СУБД без UPDATE ... RETURNING."""
+    rows = list(
+        Ticket.objects.select_for_update()
+        .filter(id__in=ids, support_line=line, status__in=statuses)
+        .values(*RETURNED_FIELDS)
+    )
+    Ticket.objects.filter(id__in=[row["id"] for row in rows]).update(**changes)
+    return [{**row, **changes} for row in rows]
+
+
+def apply_transition(ids, rule, event_type):
+    """Условный переход заявок; возвращает отсортированные id изменённых.
+
+    UPDATE не вызывает сигналы модели, поэтому версии очередей и
+    события агентам обновляются здесь же после коммита.
+    """
+    ids = sorted(set(ids))[:BULK_ACTION_MAX_IDS]
+    if not ids:
+        return []
+    line, statuses, changes = rule
+    changes = {**changes, "update_at": timezone.now()}
+    # Тот же признак поддержки RETURNING, что и для INSERT
+    if connection.features.can_return_rows_from_bulk_insert:
+        update = update_returning
+    else:
+        update = update_locked
+    with transaction.atomic():
+        rows = update(ids, line, statuses, changes)
+        levels = set()
+        tickets = []
+        for row in rows:
+            levels |= queue_levels(line, statuses[0], row["l3_watch"])
+            levels |= queue_levels(
+                row["support_line"], row["status"], row["l3_watch"]
+            )
+            tickets.append(Ticket(**row))
+        transaction.on_commit(lambda: bump_queue_versions(levels))
+        transaction.on_commit(lambda: [
+            publish_ticket_event(event_type, ticket) for ticket in tickets
+        ])
+    return sorted(row["id"] for row in rows)
+
+
+def bulk_escalate(user, ids, to_level):
+    return apply_transition(ids, escalation_rule(user, to_level), "escalated")
+
+
+def bulk_resolve(user, ids):
+    return apply_transition(ids, resolve_rule(user), "resolved")
@@ -7,6 +7,10 @@ urlpatterns = [
     path("provider/", views.provider_dashboard, name="provider"),
     path("tickets/create/", views.ticket_create, name="ticket_create"),
     path("tickets/", views.ticket_list, name="ticket_list"),
+    path("tickets/events/", views.ticket_events, name="ticket_events"),
+    path("tickets/bulk/", views.ticket_bulk_action,
+         name="ticket_bulk_action"),
+    path("tickets/search/", views.ticket_search, name="ticket_search"),
     path("tickets/<int:ticket_id>/",
          views.ticket_detail,
          name="ticket_detail"
@@ -21,9 +25,25 @@ urlpatterns = [
         name="ticket_resolve"
     ),
     path("api/data/", views.api_data_submission, name="api_data_submission"),
+    path("api/data/batch/",
+         views.api_data_batch_submission,
+         name="api_data_batch_submission"
+         ),
     path("submit-data/", views.submit_data, name="submit_data"),
     path("upload-offline/", views.upload_offline, name="upload_offline"),
     path("notifications/", views.notifications, name="notifications"),
+    path("notifications/unread-count/",
+         views.notifications_unread_count,
+         name="notifications_unread_count"
+         ),
+    path("api/tickets/", views.ticket_list_api, name="api_ticket_list"),
+    path("api/tickets/search/", views.ticket_search_api,
+         name="api_ticket_search"),
+    path("api/tickets/<int:ticket_id>/",
+         views.ticket_detail_api,
+         name="api_ticket_detail"
+         ),
+    path("metrics/", views.metrics, name="metrics"),
     path('tickets/<int:ticket_id>/comment/',
          views.ticket_add_comment,
          name="ticket_add_comment"
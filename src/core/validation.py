@@ -0,0 +1,90 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import count_submissions
+from .models import DataSubmission, Notification, SubmissionCounter
+from .notifications import bulk_notify
+from .schemas import validate_records
+
+
+def batch_errors(batch):
+    """Ошибки валидации пакета заявок.
+
+    Записи каждого канала проверяются одним вызовом скомпилированной
+    схемы канала. Возвращает список словарей ошибок в порядке пакета,
+    пустой словарь — заявка корректна.
+    """
+    errors = [None] * len(batch)
+    by_channel = {}
+    for index, submission in enumerate(batch):
+        if submission.validation_errors:
+            # Ошибки формата, найденные ещё при приёме
+            errors[index] = submission.validation_errors
+        elif submission.data is None and submission.file_upload:
+            # Загрузка файла: записи проверяются построчно
+            errors[index] = {}
+        elif not isinstance(submission.data, dict):
+            errors[index] = {"data": "Поле 'data' должно быть объектом."}
+        else:
+            by_channel.setdefault(submission.channel, []).append(index)
+    for channel, indexes in by_channel.items():
+        results = validate_records(
+            channel, [batch[index].data for index in indexes]
+        )
+        for index, result in zip(indexes, results):
+            errors[index] = result
+    return errors
+
+
+def claim_pending(batch_size):
+    """Выборка пакета ожидающих заявок с блокировкой строк.
+
+    На PostgreSQL используется SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    несколько обработчиков не получают одни и те же строки. SQLite не
+    поддерживает блокировку строк, там следует запускать один обработчик.
+    Вызывать внутри transaction.atomic().
+    """
+    pending = DataSubmission.objects.filter(status="pending").order_by("id")
+    if connection.features.has_select_for_update_skip_locked:
+        pending = pending.select_for_update(skip_locked=True)
+    return list(pending[:batch_size])
+
+
+def validate_pending_batch(batch_size=500):
+    """Проверка одного пакета ожидающих заявок.
+
+    Статусы, ошибки и время проверки записываются одним bulk_update,
+    пользователи получают по одному уведомлению об отклонённых записях.
+    Возвращает количество обработанных заявок.
+    """
+    with transaction.atomic():
+        batch = claim_pending(batch_size)
+        if not batch:
+            return 0
+        validated_at = timezone.now()
+        rejected_by_user = Counter()
+        deltas = count_submissions(batch, sign=-1)
+        for submission, errors in zip(batch, batch_errors(batch)):
+            submission.validation_errors = errors
+            submission.status = "rejected" if errors else "accepted"
+            submission.validated_at = validated_at
+            if errors and submission.user_id:
+                rejected_by_user[submission.user_id] += 1
+        DataSubmission.objects.bulk_update(
+            batch, ["status", "validation_errors", "validated_at"]
+        )
+        deltas.update(count_submissions(batch))
+        SubmissionCounter.apply(deltas)
+        bulk_notify([
+            Notification(
+                user_id=user_id,
+                message=(
+                    f"Отклонено записей при проверке данных: {count}. "
+                    "Проверьте обязательные поля и повторите отправку."
+                ),
+            )
+            for user_id, count in rejected_by_user.items()
+        ])
+    return len(batch)
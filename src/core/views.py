@@ -1,22 +1,57 @@
-from django.http import HttpResponseForbidden
+from django.conf import settings
+from django.http import (
+    HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404, redirect, render
 
 from core.models import Ticket
-from .decorators import role_required
+from .decorators import query_budget, role_required, untracked_queries
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.views import LogoutView
-
-from rest_framework.decorators import api_view
+from django.contrib.auth.views import LogoutView, redirect_to_login
+
+from rest_framework.decorators import (
+    api_view, parser_classes, permission_classes
+)
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import DataSubmission, Notification
+from .models import OFFLINE_STREAM_EXTENSIONS, DataSubmission, Notification
+from .counters import channel_totals
+from .events import get_broker
+from .metrics import collect as collect_metrics
+from .notifications import notify_l1_new_ticket, reset_unread, unread_count
+from .ingestion import (
+    API_BATCH_MAX_RECORDS, IDEMPOTENCY_CONFLICT, ingest_api_records,
+    ingest_offline_file
+)
+from .pagination import keyset_paginate
+from .parsers import NDJSONParser
+from .payload_index import filter_by_payload, payload_keys
+from .serializers import TicketSerializer, requested_fields
+from .routing import create_ticket
+from .schemas import REQUIRED, missing_fields
+from .search import (
+    SEARCH_MAX_PAGE_SIZE, SEARCH_PAGE_SIZE, search_tickets
+)
+from .triage import TriageError, bulk_escalate, bulk_resolve
+from .queues import (
+    QUEUE_FRAGMENT_TIMEOUT, queue_version, ticket_access_error,
+    visible_tickets
+)
 from django.contrib import messages
-from django.db import models
-from django.db.models import Count
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+import hashlib
 import json
 
 
+@query_budget(4)
 @login_required
 def dashboard(request):
     """Открытие дашборда"""
@@ -35,6 +70,7 @@ def pluralize_word(n, forms):
     return forms[2]
 
 
+@query_budget(12)
 @login_required
 @role_required(["respondent"])
 def submit_data(request):
@@ -50,6 +86,8 @@ def submit_data(request):
         try:
             data = json.loads(data_json)
         except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict):
             Notification.objects.create(
                 user=request.user,
                 message="Файл содержит ошибки формата JSON."
@@ -57,51 +95,70 @@ def submit_data(request):
             )
             messages.error(request, "Ошибка! Проверьте уведомления.")
             return redirect("notifications")
-        if "student_id" not in data:
+
+        missing = missing_fields(2, data)
+        if missing:
+            fields = ", ".join(f"'{name}'" for name in missing)
             Notification.objects.create(
                 user=request.user,
-                message="Обязательное поле 'student_id' отсутствует в данных.",
+                message=f"В данных отсутствуют обязательные поля: {fields}.",
             )
-            ticket = Ticket.objects.create(
+            ticket = create_ticket(
                 subject="Ошибка при отправке данных",
-                description="Отсутствует обязательное поле 'student_id'"
-                " в отправленных данных.",
+                description=(
+                    f"Отсутствуют обязательные поля {fields} "
+                    "в отправленных данных."
+                ),
                 user=request.user,
-                support_line=1,
-                category="notification"
+                category="notification",
+            )
+            notify_l1_new_ticket(ticket)
+            messages.error(
+                request, "Обнаружена ошибка, мы уже передали её в поддержку."
             )
-
-            l1_agents = User.objects.filter(role="support", support_level=1)
-            for agent in l1_agents:
-                Notification.objects.create(
-                    user=agent,
-                    message=(
-                        f"Новая заявка от {request.user.username}: "
-                        f"{ticket.subject}"
-                    )
-                )
-            messages.error(request,
-                           "Обнаружена ошибка, мы уже передали её в поддержку."
-                           )
             return redirect("notifications")
 
+        # Остальные правила схемы проверяет validate_submissions
         DataSubmission.objects.create(
             user=request.user, channel=2, data=data, status="pending"
         )
         Notification.objects.create(
             user=request.user,
-            message="Данные успешно приняты. Спасибо!"
+            message="Данные приняты и ожидают проверки. Спасибо!"
         )
         messages.success(request, "Данные успешно отправлены")
         return redirect("dashboard")
     return render(request, "submit_data.html")
 
 
+ADMIN_PAGE_SIZE = 50
+INBOX_PAGE_SIZE = 30
+# Колонки таблицы мониторинга; тяжёлые JSON-поля не загружаются
+ADMIN_SUBMISSION_FIELDS = (
+    "id",
+    "user__username",
+    "provider_name",
+    "channel",
+    "status",
+    "submitted_at",
+)
+
+
+def cursor_query(request, cursor):
+    """Строка запроса со сменой курсора и сохранением фильтров."""
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query["cursor"] = cursor
+    return query.urlencode()
+
+
+@query_budget(6)
 @role_required(["admin"])
 def admin_dashboard(request):
     """Страница админа"""
-    submissions = (
-        DataSubmission.objects.select_related("user").order_by("-submitted_at")
+    submissions = DataSubmission.objects.select_related("user").only(
+        *ADMIN_SUBMISSION_FIELDS
     )
     channel = request.GET.get("channel")
     status = request.GET.get("status")
@@ -109,37 +166,40 @@ def admin_dashboard(request):
         submissions = submissions.filter(channel=channel)
     if status:
         submissions = submissions.filter(status=status)
-    stats_raw = (
-        DataSubmission.objects.values("channel").annotate(total=Count("id"))
+    payload_key = request.GET.get("key", "")
+    payload_value = request.GET.get("value", "").strip()
+    if payload_key in payload_keys() and payload_value:
+        submissions = filter_by_payload(
+            submissions, payload_key, payload_value
+        )
+    page = keyset_paginate(
+        submissions,
+        request.GET.get("cursor"),
+        ADMIN_PAGE_SIZE,
+        "submitted_at",
     )
-    stats = []
+    totals = channel_totals()
     channel_labels = {1: "API", 2: "Онлайн", 3: "Оффлайн"}
-    for item in stats_raw:
-        ch = item["channel"]
-        total = item["total"]
-        word = pluralize_word(total, ("запись", "записи", "записей"))
+    stats = []
+    for ch in sorted(set(channel_labels) | set(totals)):
+        total = totals.get(ch, 0)
         stats.append({
             "channel": ch,
             "channel_label": channel_labels.get(ch, f"Канал {ch}"),
             "total": total,
-            "word": word
+            "word": pluralize_word(total, ("запись", "записи", "записей"))
         })
-    for ch in [1, 2, 3]:
-        if not any(s['channel'] == ch for s in stats):
-            stats.append({
-                "channel": ch,
-                "channel_label": channel_labels[ch],
-                "total": 0,
-                "word": pluralize_word(0, ("запись", "записи", "записей"))
-            })
-
-    stats.sort(key=lambda x: x['channel'])
 
     return render(request, "admin_dashboard.html", {
-        "submissions": submissions,
+        "submissions": page,
+        "next_query": cursor_query(request, page.next_cursor),
+        "prev_query": cursor_query(request, page.prev_cursor),
         "stats": stats,
         "current_channel": channel,
         "current_status": status,
+        "payload_keys": payload_keys(),
+        "current_key": payload_key,
+        "current_value": payload_value,
     })
 
 
@@ -153,6 +213,7 @@ class CustomLogoutView(LogoutView):
     http_method_names = ["get", "post", "head", "options"]
 
 
+@query_budget(10)
 @role_required(["provider", "admin"])
 def ticket_create(request):
     """Создание заявки"""
@@ -161,46 +222,86 @@ def ticket_create(request):
         description = request.POST.get("description")
         category = request.POST.get("category", "other")
 
-        ticket = Ticket.objects.create(
-            subject=subject,
-            description=description,
-            user=request.user,
-            support_line=1,
-            category=category,
-        )
-        if category in ["api_issue", "system_performance"]:
-            ticket.support_line = 2
-            ticket.status = "escalated"
-            ticket.save()
+        ticket = create_ticket(request.user, subject, description, category)
 
-        l1_agents = User.objects.filter(role="support", support_level=1)
-        for agent in l1_agents:
-            Notification.objects.create(
-                user=agent,
-                message=f"Новая заявка от {request.user.username}: {subject}",
-            )
+        notify_l1_new_ticket(ticket)
         return redirect("ticket_list")
     return render(request, "tickets/create.html")
 
 
+@query_budget(5)
 @role_required(["support"])
 def ticket_list(request):
     """Список заявок"""
-    if request.user.support_level == 1:
-        tickets = Ticket.objects.filter(
-            support_line=1, status__in=["open", "in_progress"]
-        ).order_by("-created_at")
-    elif request.user.support_level == 2:
-        tickets = Ticket.objects.filter(
-            support_line=2, status="escalated").order_by("-created_at")
-    elif request.user.support_level == 3:
-        tickets = Ticket.objects.filter(
-            models.Q(support_line=3)
-            | models.Q(category__in=["system_performance", "response_time"])
-        )
-    else:
-        tickets = Ticket.objects.none()
-    return render(request, "tickets/list.html", {"tickets": tickets})
+    tickets = visible_tickets(request.user)
+    # Автор выводится в каждой строке списка
+    tickets = tickets.select_related("user")
+    # Выборка ленивая: при попадании в кэш фрагмента запрос не выполняется
+    return render(request, "tickets/list.html", {
+        "tickets": tickets,
+        "queue_version": queue_version(request.user.support_level),
+        "queue_cache_timeout": QUEUE_FRAGMENT_TIMEOUT,
+    })
+
+
+def search_page(request):
+    try:
+        return max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        return 1
+
+
+@query_budget(4)
+@role_required(["support"])
+def ticket_search(request):
+    """Поиск по теме и описанию заявок очереди агента"""
+    query = request.GET.get("q", "").strip()
+    page = search_page(request)
+    tickets, has_next = search_tickets(request.user, query, page)
+    return render(request, "tickets/search.html", {
+        "query": query,
+        "tickets": tickets,
+        "page": page,
+        "has_next": has_next,
+    })
+
+
+SSE_HEARTBEAT_SECONDS = 15
+
+
+@untracked_queries
+async def ticket_events(request):
+    """Поток событий заявок (Server-Sent Events) для агентов поддержки.
+
+    Работает под ASGI-сервером; агент получает события заявок своего
+    уровня без повторной загрузки списка.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    if user.role != "support" or not user.support_level:
+        return HttpResponseForbidden("Доступно только агентам поддержки")
+    subscription = get_broker().subscribe(user.support_level)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                event = await subscription.get(SSE_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                data = json.dumps(event, ensure_ascii=False)
+                yield f"event: ticket.{event['type']}\ndata: {data}\n\n"
+        finally:
+            await subscription.close()
+
+    response = StreamingHttpResponse(
+        stream(), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 @role_required(["support"])
@@ -219,20 +320,15 @@ def ticket_escalate(request, ticket_id):
     return render(request, "tickets/escalate.html", {"ticket": ticket})
 
 
+@query_budget(5)
 @role_required(["support"])
 def ticket_detail(request, ticket_id):
-    ticket = get_object_or_404(Ticket, id=ticket_id)
-    if request.user.support_level == 1 and ticket.support_line != 1:
-        return HttpResponseForbidden(
-            "Вы можете просматривать только заявки L1."
-            )
-    elif (
-        request.user.support_level in [2, 3]
-        and ticket.support_line != request.user.support_level
-    ):
-        return HttpResponseForbidden(
-            "Вы можете просматривать только заявки вашего уровня."
-        )
+    ticket = get_object_or_404(
+        Ticket.objects.select_related("user"), id=ticket_id
+    )
+    error = ticket_access_error(request.user, ticket)
+    if error:
+        return HttpResponseForbidden(error)
     return render(request, "tickets/detail.html", {"ticket": ticket})
 
 
@@ -260,37 +356,143 @@ def ticket_resolve(request, ticket_id):
     return redirect("ticket_detail", ticket_id)
 
 
+def bulk_action_error(request, message, status):
+    """Ошибка массового действия: 400 — неверный запрос, 403 — запрет."""
+    if "application/json" in request.headers.get("Accept", ""):
+        return JsonResponse({"error": message}, status=status)
+    return HttpResponse(message, status=status)
+
+
+@query_budget(4)
+@role_required(["support"])
+def ticket_bulk_action(request):
+    """Массовая эскалация или решение отмеченных заявок очереди.
+
+    Меняются только заявки, которые всё ещё подходят под правила
+    уровня агента; остальные возвращаются как пропущенные.
+    """
+    if request.method != "POST":
+        return redirect("ticket_list")
+    ids = []
+    for value in request.POST.getlist("ticket_ids"):
+        try:
+            ids.append(int(value))
+        except ValueError:
+            continue
+    action = request.POST.get("action")
+    if action not in ("escalate", "resolve"):
+        return bulk_action_error(request, "Неизвестное действие", 400)
+    try:
+        to_level = int(request.POST.get("to_level", 2))
+    except ValueError:
+        return bulk_action_error(request, "Неверный уровень эскалации", 400)
+    try:
+        if action == "escalate":
+            changed = bulk_escalate(request.user, ids, to_level)
+        else:
+            changed = bulk_resolve(request.user, ids)
+    except TriageError as error:
+        return bulk_action_error(request, str(error), 403)
+    skipped = sorted(set(ids) - set(changed))
+    if "application/json" in request.headers.get("Accept", ""):
+        return JsonResponse({"changed": changed, "skipped": skipped})
+    if changed:
+        messages.success(request, "Изменены заявки: " + ", ".join(
+            f"#{ticket_id}" for ticket_id in changed
+        ))
+    if skipped:
+        messages.warning(request, "Не изменены (уже обработаны или "
+                         "недоступны): " + ", ".join(
+                             f"#{ticket_id}" for ticket_id in skipped
+                         ))
+    return redirect("ticket_list")
+
+
 User = get_user_model()
 
 
+@query_budget(12)
 @api_view(["POST"])
 def api_data_submission(request):
-    """Канал 1: Приём данных через API"""
-    provider_name = request.data.get("provider_name")
-    data_payload = request.data.get("data")
-    if not provider_name:
+    """Канал 1: Приём данных через API.
+
+    Повтор запроса (тот же заголовок Idempotency-Key или те же данные
+    в пределах окна дедупликации) возвращает исходную заявку.
+    """
+    [result] = ingest_api_records(
+        [request.data], request.headers.get("Idempotency-Key")
+    )
+    if result.get("error") == IDEMPOTENCY_CONFLICT:
+        return Response(
+            {"error": result["error"]},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if "error" in result:
         return Response(
-            {"error": "Требуется поле 'provider_name'"},
+            {"error": result["error"]},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    if not data_payload or not isinstance(data_payload, dict):
+    if result.get("duplicate"):
+        return Response(
+            {
+                "message": "Данные уже получены",
+                "submission_id": result["submission_id"],
+                "status": result["status"],
+                "duplicate": True,
+            },
+            status=status.HTTP_200_OK,
+        )
+    return Response(
+        {
+            "message": "Данные получены",
+            "submission_id": result["submission_id"],
+            "status": result["status"],
+        },
+        status=status.HTTP_201_CREATED,
+    )
+
+
+@api_view(["POST"])
+@parser_classes([JSONParser, NDJSONParser])
+def api_data_batch_submission(request):
+    """Канал 1: Пакетный приём данных через API (JSON-массив или NDJSON).
+
+    Фиксированного бюджета запросов нет: вставка идёт пачками, и число
+    запросов растёт с размером пакета. Постоянная часть и число запросов
+    на пачку проверяются в тестах.
+    """
+    records = request.data
+    if not isinstance(records, list):
         return Response(
-            {"error": "Требуется поле 'data' в виде объекта"},
+            {"error": "Ожидается JSON-массив или NDJSON"},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    submission = DataSubmission.objects.create(
-        provider_name=provider_name,
-        channel=1,
-        data=data_payload,
-        status="pending"
+    if len(records) > API_BATCH_MAX_RECORDS:
+        return Response(
+            {"error": f"Не более {API_BATCH_MAX_RECORDS} записей в пакете"},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+    results = ingest_api_records(
+        records, request.headers.get("Idempotency-Key")
     )
+    duplicates = sum(1 for result in results if result.get("duplicate"))
+    accepted = sum(1 for result in results if "submission_id" in result)
+    created = accepted - duplicates
+    if created:
+        response_status = status.HTTP_201_CREATED
+    elif accepted:
+        response_status = status.HTTP_200_OK
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
     return Response(
         {
             "message": "Данные получены",
-            "submission_id": submission.id,
-            "status": "pending",
+            "created": created,
+            "duplicates": duplicates,
+            "failed": len(results) - accepted,
+            "results": results,
         },
-        status=status.HTTP_201_CREATED,
+        status=response_status,
     )
 
 
@@ -307,120 +509,296 @@ def upload_offline(request):
             )
 
             # Создаем заявку
-            ticket = Ticket.objects.create(
+            ticket = create_ticket(
                 subject="Ошибка при загрузке файла",
                 description="Респондент не выбрал файл для отправки данных.",
                 user=request.user,
-                support_line=1,
-                category="notification"
+                source="upload",
+                category="notification",
             )
 
             # Уведомляем l1
-            l1_agents = User.objects.filter(role="support", support_level=1)
-            for agent in l1_agents:
-                Notification.objects.create(
-                    user=agent,
-                    message=(
-                        f"Новая заявка от {request.user.username}: "
-                        f"{ticket.subject}"
-                    )
-                )
+            notify_l1_new_ticket(ticket)
 
             messages.error(
                 request, "Обнаружена ошибка. Поддержка уже уведомлена."
                 )
             return redirect("upload_offline")
-        if not uploaded_file.name.endswith((".json", ".csv")):
+        if not uploaded_file.name.endswith(
+            (".json",) + OFFLINE_STREAM_EXTENSIONS
+        ):
             Notification.objects.create(
                 user=request.user,
                 message=(
-                    "Неподдерживаемый формат файла. Ожидается .json или .csv"
+                    "Неподдерживаемый формат файла. "
+                    "Ожидается .json, .csv или .ndjson"
                 )
             )
-            ticket = Ticket.objects.create(
+            ticket = create_ticket(
                 subject="Ошибка формата файла",
                 description="Загружен файл с недопустимым расширением.",
                 user=request.user,
-                support_line=1,
-                category="notification"
+                source="upload",
+                category="notification",
             )
 
             # Уведомляем l1
-            l1_agents = User.objects.filter(role="support", support_level=1)
-            for agent in l1_agents:
-                Notification.objects.create(
-                    user=agent,
-                    message=f"Новая заявка от {request.user.username}: "
-                    f"{ticket.subject}"
-                )
+            notify_l1_new_ticket(ticket)
 
             messages.error(
                 request, "Обнаружена ошибка. Поддержка уже уведомлена.")
             return redirect("upload_offline")
 
-        submission = DataSubmission.objects.create(
-            user=request.user,
-            channel=3,
-            file_upload=uploaded_file,
-            status="pending"
-        )
-
-        if uploaded_file.name.endswith(".json"):
-            try:
-                data = json.load(uploaded_file)
-                submission.data = data
-                if "student_id" not in data:
-                    raise ValueError(
-                        "Обязательное поле 'student_id' отсутствует.")
-                submission.status = "accepted"
-            except (ValueError, TypeError, json.JSONDecodeError) as e:
-                error_msg = str(e) if str(e) else "Неверный формат JSON"
+        if uploaded_file.name.endswith(OFFLINE_STREAM_EXTENSIONS):
+            _, total, invalid = ingest_offline_file(
+                request.user, uploaded_file
+            )
+            if invalid:
                 Notification.objects.create(
                     user=request.user,
-                    message=f"Ошибка в файле: {error_msg}"
+                    message=(
+                        f"Файл загружен: строк {total}, из них с ошибками "
+                        f"формата {invalid}. Строки с ошибками сохранены "
+                        "в отчёте о загрузке."
+                    )
                 )
-
-                ticket = Ticket.objects.create(
-                    subject="Ошибка в содержимом файла",
+                ticket = create_ticket(
+                    subject="Ошибки в строках файла",
                     description=(
-                        f"При загрузке файла возникла ошибка: {error_msg}"
+                        f"В файле {uploaded_file.name} ошибки формата "
+                        f"в {invalid} из {total} строк."
                     ),
                     user=request.user,
-                    support_line=1,
-                    category="notification"
+                    source="upload",
+                    category="notification",
                 )
+                notify_l1_new_ticket(ticket)
+            messages.success(request, "Файл успешно загружен!")
+            return redirect("dashboard")
 
-                l1_agents = (
-                    User.objects.filter(role="support", support_level=1)
-                )
-                for agent in l1_agents:
-                    Notification.objects.create(
-                        user=agent,
-                        message=(
-                            f"Новая заявка от {request.user.username}: "
-                            f"{ticket.subject}"
-                        )
-                    )
+        # Заявка сохраняется один раз, уже в итоговом статусе: в pending
+        # её заберёт validate_submissions
+        submission = DataSubmission(
+            user=request.user,
+            channel=3,
+            file_upload=uploaded_file,
+            status="pending"
+        )
+        error_msg = None
+        try:
+            uploaded_file.seek(0)
+            submission.data = json.load(uploaded_file)
+        except (ValueError, TypeError, json.JSONDecodeError) as e:
+            error_msg = str(e) if str(e) else "Неверный формат JSON"
+            submission.validation_errors = {"content": error_msg}
+        else:
+            missing = (
+                missing_fields(3, submission.data)
+                if isinstance(submission.data, dict) else []
+            )
+            if missing:
+                fields = ", ".join(f"'{name}'" for name in missing)
+                error_msg = f"Обязательные поля {fields} отсутствуют."
+                submission.validation_errors = {
+                    name: REQUIRED for name in missing
+                }
+        if error_msg is not None:
+            Notification.objects.create(
+                user=request.user,
+                message=f"Ошибка в файле: {error_msg}"
+            )
 
-                submission.status = "rejected"
-                submission.validation_errors = {"content": error_msg}
+            ticket = create_ticket(
+                subject="Ошибка в содержимом файла",
+                description=(
+                    f"При загрузке файла возникла ошибка: {error_msg}"
+                ),
+                user=request.user,
+                source="upload",
+                category="notification",
+            )
+
+            notify_l1_new_ticket(ticket)
+
+            submission.status = "rejected"
+            submission.validated_at = timezone.now()
         submission.save()
         messages.success(request, "Файл успешно загружен!")
         return redirect("dashboard")
     return render(request, "upload_offline.html")
 
 
+@query_budget(6)
 @login_required
 def notifications(request):
-    """Уведомления"""
-    notifications = Notification.objects.filter(user=request.user).order_by(
-        "-created_at"
+    """Уведомления.
+
+    На первой странице отдельным блоком идут непрочитанные, под ними —
+    история прочитанных с самого нового; ссылка «Старее» листает
+    историю дальше. Прочитанными отмечаются только показанные
+    уведомления.
+    """
+    inbox = Notification.objects.filter(user=request.user)
+    cursor = request.GET.get("cursor")
+    unread = []
+    if not cursor:
+        unread = list(
+            inbox.filter(is_read=False)
+            .order_by("-created_at", "-id")[:INBOX_PAGE_SIZE]
+        )
+    page = keyset_paginate(
+        inbox.filter(is_read=True), cursor, INBOX_PAGE_SIZE, "created_at"
     )
-    notifications.update(is_read=True)
+
+    if unread:
+        Notification.objects.filter(
+            pk__in=[note.pk for note in unread]
+        ).update(is_read=True)
+        reset_unread(request.user.pk)
     return render(
         request,
-        "notifications.html", {"notifications": notifications}
+        "notifications.html", {
+            "unread": unread,
+            "notifications": page,
+            "older_cursor": page.next_cursor,
+            "is_first_page": not cursor,
+        }
+        )
+
+
+@query_budget(3)
+@login_required
+def notifications_unread_count(request):
+    """Количество непрочитанных уведомлений (JSON)"""
+    return JsonResponse({"unread": unread_count(request.user.pk)})
+
+
+class TicketCursorPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+def support_agent(request):
+    if request.user.role != "support":
+        raise PermissionDenied("Доступно только агентам поддержки")
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256(
+        "|".join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def not_modified(request, etag):
+    header = request.headers.get("If-None-Match")
+    return bool(header) and (
+        etag in parse_etags(header) or header.strip() == "*"
+    )
+
+
+def conditional(request, etag, build):
+    """304 при совпадении ETag, иначе ответ из build()."""
+    if not_modified(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(build())
+    response["ETag"] = etag
+    return response
+
+
+@query_budget(4)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def ticket_list_api(request):
+    """Очередь заявок агента (JSON, курсорная пагинация).
+
+    Видимость та же, что у ticket_list. ETag зависит от времени
+    изменения заявок очереди: повторный опрос с If-None-Match получает
+    304 без выборки и сериализации.
+    """
+    support_agent(request)
+    tickets = visible_tickets(request.user)
+    # Версия очереди: время последнего изменения и число заявок
+    state = tickets.order_by().aggregate(
+        changed=Max("update_at"), total=Count("id")
+    )
+    etag = make_etag(
+        request.user.support_level, request.get_full_path(),
+        state["changed"], state["total"],
+    )
+
+    def build():
+        paginator = TicketCursorPagination()
+        page = paginator.paginate_queryset(
+            tickets.select_related("user"), request
+        )
+        data = TicketSerializer(
+            page, many=True, fields=requested_fields(request)
+        ).data
+        return paginator.get_paginated_response(data).data
+
+    return conditional(request, etag, build)
+
+
+@query_budget(4)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def ticket_search_api(request):
+    """Поиск заявок очереди агента (JSON), по релевантности, по страницам"""
+    support_agent(request)
+    page = search_page(request)
+    try:
+        page_size = min(
+            max(int(request.GET.get("page_size", SEARCH_PAGE_SIZE)), 1),
+            SEARCH_MAX_PAGE_SIZE,
         )
+    except ValueError:
+        page_size = SEARCH_PAGE_SIZE
+    tickets, has_next = search_tickets(
+        request.user, request.GET.get("q", ""), page, page_size
+    )
+    url = request.build_absolute_uri()
+    return Response({
+        "next": replace_query_param(url, "page", page + 1)
+        if has_next else None,
+        "previous": replace_query_param(url, "page", page - 1)
+        if page > 1 else None,
+        "results": TicketSerializer(
+            tickets, many=True, fields=requested_fields(request)
+        ).data,
+    })
+
+
+@query_budget(3)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def ticket_detail_api(request, ticket_id):
+    """Заявка по идентификатору (JSON), видимость как у ticket_detail"""
+    support_agent(request)
+    ticket = get_object_or_404(
+        Ticket.objects.select_related("user"), id=ticket_id
+    )
+    error = ticket_access_error(request.user, ticket)
+    if error:
+        raise PermissionDenied(error)
+    etag = make_etag(ticket.id, ticket.update_at, request.get_full_path())
+    return conditional(
+        request, etag,
+        lambda: TicketSerializer(
+            ticket, fields=requested_fields(request)
+        ).data,
+    )
+
+
+def metrics(request):
+    """Метрики Prometheus (доступны только с разрешённых адресов)"""
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden("Метрики доступны только локально")
+    content, content_type = collect_metrics()
+    return HttpResponse(content, content_type=content_type)
 
 
 @role_required(["support"])
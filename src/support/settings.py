@@ -14,27 +14,6 @@ from pathlib import Path
 import os
 from urllib.parse import urlparse
 
-db_url = os.getenv("DATABASE_URL", "sqlite:///db.sqlite3")
-if db_url.startswith("postgres"):
-    url = urlparse(db_url)
-    DATABASES = {
-        "default": {
-            "ENGINE": "django.db.backends.postgresql",
-            "NAME": url.path[1:],
-            "USER": url.username,
-            "PASSWORD": url.password,
-            "HOST": url.hostname,
-            "PORT": url.port or 5432,
-        }
-    }
-else:
-    DATABASES = {
-        "default": {
-            "ENGINE": "django.db.backends.sqlite3",
-            "NAME": db_url.replace("sqlite:///", ""),
-        }
-    }
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -65,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.QueryCountMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,6 +67,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "core.context_processors.unread_notifications",
             ],
         },
     },
@@ -97,12 +79,45 @@ WSGI_APPLICATION = "support.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+db_url = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+if db_url.startswith("postgres"):
+    url = urlparse(db_url)
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": url.path[1:],
+            "USER": url.username,
+            "PASSWORD": url.password,
+            "HOST": url.hostname,
+            "PORT": url.port or 5432,
+            # Соединение проверяется перед использованием: и в пуле,
+            # и при повторном использовании постоянного соединения
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+    if os.getenv("DB_POOL", "1") == "1":
+        # Пул соединений psycopg: запрос берёт готовое соединение вместо
+        # установки нового. Пул несовместим с CONN_MAX_AGE, тот остаётся 0
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+                "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+                "max_idle": 300,
+            },
+        }
+    else:
+        # Постоянные соединения вместо нового на каждый запрос
+        DATABASES["default"]["CONN_MAX_AGE"] = int(
+            os.getenv("DB_CONN_MAX_AGE", 60)
+        )
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": db_url.replace("sqlite:///", ""),
+        }
     }
-}
 
 
 # Password validation
@@ -148,6 +163,52 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "core.User"
 
+# События заявок для агентов (SSE). Для нескольких узлов:
+# {"BACKEND": "core.events.RedisBroker", "OPTIONS": {"URL": "redis://..."}}
+TICKET_EVENTS = {
+    "BACKEND": os.getenv("TICKET_EVENTS_BACKEND",
+                         "core.events.InProcessBroker"),
+}
+
+# Учёт SQL-запросов (core.middleware.QueryCountMiddleware): при
+# QUERY_BUDGET_STRICT превышение бюджета представления вызывает ошибку,
+# иначе пишется предупреждение в лог core.sql
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "0") == "1"
+SQL_DUPLICATE_THRESHOLD = 5
+
+# Повторы записей API: одинаковые (provider_name, data) в пределах окна
+# и повторные запросы с тем же Idempotency-Key не создают новых заявок
+SUBMISSION_DEDUP_WINDOW = int(os.getenv("SUBMISSION_DEDUP_WINDOW", 600))
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Срок хранения заявок данных в рабочей таблице; более старые переносит
+# в архив команда archive_submissions
+SUBMISSION_RETENTION_DAYS = int(os.getenv("SUBMISSION_RETENTION_DAYS", 365))
+
+# Поля данных заявок с индексом для поиска (core.payload_index); после
+# изменения списка нужен migrate, чтобы пересобрать индекс на SQLite
+SUBMISSION_PAYLOAD_KEYS = ["student_id"]
+
+# Адреса, с которых доступен эндпоинт /metrics/
+METRICS_ALLOWED_IPS = os.getenv(
+    "METRICS_ALLOWED_IPS", "127.0.0.1,::1"
+).split(",")
+
+# Общий кэш для нескольких процессов: REDIS_CACHE_URL=redis://host:6379/1
+# (нужен пакет redis); по умолчанию — память процесса
+if os.getenv("REDIS_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_CACHE_URL"),
+        }
+    }
+
+# Сессии читаются из кэша (с записью в БД), пользователь сессии —
+# из кэша core.backends; при нескольких процессах нужен общий кэш
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+AUTHENTICATION_BACKENDS = ["core.backends.CachedModelBackend"]
+
 LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/accounts/login/"